@@ -0,0 +1,154 @@
+import calendar
+import heapq
+import json
+import time
+
+from pricing import SIZE_NAMES
+
+
+
+WINDOWS = {"hour": 3600, "day": 86400, "week": 604800}
+
+
+class SalesReport:
+    # running totals over a stream of order log rows (see order_log.OrderLog).
+    # every aggregate is a sum keyed by something small (flavor, roast, recipe name, size, time window),
+    # so memory depends on how many distinct keys there are, not on how many orders were read.
+    def __init__(self, window=86400, since=None, until=None):
+        self.window = window
+        self.since = since
+        self.until = until
+        self.orders = 0
+        self.cents = 0
+        self.first = None
+        self.last = None
+        self.pumps_by_flavor = {}
+        self.shots_by_roast = {}
+        self.creamers = 0
+        self.sugars = 0
+        self.popularity = {} # recipe name -> orders
+        self.by_size = {} # size -> [orders, cents]
+        self.by_window = {} # window start (unix seconds) -> [orders, cents]
+
+    def add(self, row):
+        when, name, flavor, roast, size, pump, shot, creamer, sugar, cents = row
+        if self.since is not None and when < self.since:
+            return
+        if self.until is not None and when >= self.until:
+            return
+        self.orders += 1
+        self.cents += cents
+        if self.first is None or when < self.first:
+            self.first = when
+        if self.last is None or when > self.last:
+            self.last = when
+        if flavor and pump:
+            self.pumps_by_flavor[flavor] = self.pumps_by_flavor.get(flavor, 0) + pump
+        if roast and shot:
+            self.shots_by_roast[roast] = self.shots_by_roast.get(roast, 0) + shot
+        self.creamers += creamer
+        self.sugars += sugar
+        self.popularity[name] = self.popularity.get(name, 0) + 1
+        totals = self.by_size.get(size)
+        if totals is None:
+            totals = self.by_size[size] = [0, 0]
+        totals[0] += 1
+        totals[1] += cents
+        start = when - when % self.window
+        totals = self.by_window.get(start)
+        if totals is None:
+            totals = self.by_window[start] = [0, 0]
+        totals[0] += 1
+        totals[1] += cents
+
+    def update(self, rows):
+        add = self.add
+        for row in rows:
+            add(row)
+        return self
+
+    def merge(self, other): # combine with a report over another log (e.g. another register)
+        self.orders += other.orders
+        self.cents += other.cents
+        for when in (other.first, other.last):
+            if when is not None:
+                self.first = when if self.first is None else min(self.first, when)
+                self.last = when if self.last is None else max(self.last, when)
+        for mine, theirs in ((self.pumps_by_flavor, other.pumps_by_flavor), (self.shots_by_roast, other.shots_by_roast),
+                             (self.popularity, other.popularity)):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        self.creamers += other.creamers
+        self.sugars += other.sugars
+        for mine, theirs in ((self.by_size, other.by_size), (self.by_window, other.by_window)):
+            for key, (orders, cents) in theirs.items():
+                totals = mine.setdefault(key, [0, 0])
+                totals[0] += orders
+                totals[1] += cents
+        return self
+
+    def top(self, n=10): # most ordered recipes as (name, orders)
+        return heapq.nlargest(n, self.popularity.items(), key=lambda item: item[1])
+
+    def to_dict(self, top=10):
+        return {
+            "orders": self.orders,
+            "revenue": self.cents / 100,
+            "first": self.first,
+            "last": self.last,
+            "pumps_by_flavor": dict(sorted(self.pumps_by_flavor.items(), key=lambda item: -item[1])),
+            "shots_by_roast": dict(sorted(self.shots_by_roast.items(), key=lambda item: -item[1])),
+            "creamers": self.creamers,
+            "sugars": self.sugars,
+            "top_recipes": [{"name": name, "orders": orders} for name, orders in self.top(top)],
+            "revenue_by_size": {SIZE_NAMES.get(size, str(size)): cents / 100 for size, (orders, cents) in sorted(self.by_size.items())},
+            "orders_by_size": {SIZE_NAMES.get(size, str(size)): orders for size, (orders, cents) in sorted(self.by_size.items())},
+            "window_seconds": self.window,
+            "windows": [
+                {"start": start, "orders": orders, "revenue": cents / 100}
+                for start, (orders, cents) in sorted(self.by_window.items())
+            ]
+        }
+
+    def print_report(self, top=10):
+        print(f"Orders: {self.orders}    Revenue: {self.cents / 100:.2f}")
+        if not self.orders:
+            return
+        print(f"\nTop {top} recipes")
+        for name, orders in self.top(top):
+            print(f"  {name:<40} {orders:>10}")
+        print("\nPumps by flavor")
+        for flavor, pumps in sorted(self.pumps_by_flavor.items(), key=lambda item: -item[1]):
+            print(f"  {flavor:<40} {pumps:>10}")
+        print("\nShots by roast")
+        for roast, shots in sorted(self.shots_by_roast.items(), key=lambda item: -item[1]):
+            print(f"  {roast:<40} {shots:>10}")
+        print(f"  {'creamers':<40} {self.creamers:>10}\n  {'sugars':<40} {self.sugars:>10}")
+        print("\nRevenue by size")
+        for size, (orders, cents) in sorted(self.by_size.items()):
+            print(f"  {SIZE_NAMES.get(size, str(size)):<10} {orders:>10} orders {cents / 100:>14.2f}")
+        print("\nRevenue by window (UTC)")
+        for start, (orders, cents) in sorted(self.by_window.items()):
+            print(f"  {time.strftime('%Y-%m-%d %H:%M', time.gmtime(start)):<20} {orders:>10} orders {cents / 100:>14.2f}")
+
+
+def parse_time(value): # unix seconds or YYYY-MM-DD[THH:MM] (UTC)
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    for pattern in ("%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return calendar.timegm(time.strptime(value, pattern))
+        except ValueError:
+            continue
+    raise ValueError(f"cannot read time '{value}'")
+
+
+def run_report(order_log, window="day", since=None, until=None, top=10, as_json=False):
+    report = SalesReport(WINDOWS.get(window, 86400), parse_time(since), parse_time(until)).update(order_log)
+    if as_json:
+        print(json.dumps(report.to_dict(top)))
+    else:
+        report.print_report(top)
+    return report
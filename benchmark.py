@@ -0,0 +1,241 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+from recipe_manager import Recipe, Recipe_Manager, User_Interaction
+
+
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.csv")
+SEED_FILES = [SEED_FILE, os.path.join(os.path.dirname(SEED_FILE), "Other", "prefilled.csv")]
+
+
+def seed_rows(seed_file=SEED_FILE): # real recipes to copy from so synthetic catalogs look like ours
+    with open(seed_file, mode='r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        return [row for row in reader if len(row) >= 8]
+
+
+def synthetic_rows(count, seed_files=SEED_FILES):
+    seeds = [row for seed_file in seed_files if os.path.exists(seed_file) for row in seed_rows(seed_file)]
+    for i in range(count):
+        row = list(seeds[i % len(seeds)])
+        row[0] = f"{row[0].strip()} #{i}" # names must stay unique
+        yield row
+
+
+def write_catalog(path, count, seed_files=SEED_FILES):
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "flavor", "pumps", "roast", "shots", "creamer", "sugar", "iced"])
+        writer.writerows(synthetic_rows(count, seed_files))
+    return path
+
+
+@contextmanager
+def quiet(): # stdout to devnull for the duration, closing it after
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+
+def result(bench, backend, rows, ops, seconds, **extra):
+    entry = {
+        "bench": bench,
+        "backend": backend,
+        "rows": rows,
+        "ops": ops,
+        "seconds": round(seconds, 6),
+        "ops_per_sec": round(ops / seconds, 1) if seconds else None
+    }
+    entry.update(extra)
+    return entry
+
+
+def bench_memory(count, columnar=False):
+    # bytes per recipe held by a loaded manager (store plus indexes) and peak bytes while loading
+    with tempfile.TemporaryDirectory() as folder:
+        path = write_catalog(os.path.join(folder, "recipes.csv"), count)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        with quiet():
+            manager = Recipe_Manager(path, columnar=columnar)
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "bench": "memory",
+        "backend": "columnar" if columnar else "list",
+        "rows": len(manager.recipes),
+        "bytes_per_recipe": round((after - before) / max(count, 1), 1),
+        "peak_bytes": peak - before
+        }
+
+
+def bench_catalog(rows, columnar=False, ops=1000):
+    # times each Recipe_Manager / receipt hot path against one synthetic catalog of `rows` recipes
+    backend = "columnar" if columnar else "list"
+    results = []
+    rng = random.Random(rows)
+    with tempfile.TemporaryDirectory() as folder, quiet():
+        path = write_catalog(os.path.join(folder, "recipes.csv"), rows)
+        size_bytes = os.path.getsize(path)
+
+        start = time.perf_counter()
+        manager = Recipe_Manager(path, columnar=columnar)
+        seconds = time.perf_counter() - start
+        results.append(result("load_recipes", backend, rows, rows, seconds, bytes_read=size_bytes))
+
+        start = time.perf_counter() # just the csv -> Recipe step of that load, no indexing
+        for recipe in manager.parse_recipes():
+            pass
+        results.append(result("parse_recipes", backend, rows, rows, time.perf_counter() - start, bytes_read=size_bytes))
+
+        start = time.perf_counter()
+        manager.save_recipe()
+        results.append(result("save_recipe", backend, rows, rows, time.perf_counter() - start, bytes_written=size_bytes))
+
+        names = [recipe.name for recipe in manager.recipes[:min(rows, 5000)]]
+        lookups = [rng.choice(names) for _ in range(ops * 10)]
+        start = time.perf_counter()
+        for name in lookups:
+            manager.exact_match(name)
+        results.append(result("exact_match", backend, rows, len(lookups), time.perf_counter() - start))
+
+        terms = [rng.choice(names).split(" #")[0][:6] for _ in range(max(ops // 100, 5))]
+        start = time.perf_counter()
+        for term in terms:
+            manager.view_recipes(term, limit=20)
+        results.append(result("view_recipes_search", backend, rows, len(terms), time.perf_counter() - start))
+
+        start = time.perf_counter()
+        manager.similar_recipes(names[0]) # first call builds the index
+        results.append(result("similar_index_build", backend, rows, rows, time.perf_counter() - start))
+        start = time.perf_counter()
+        for name in lookups[:ops]:
+            manager.similar_recipes(name, 10)
+        results.append(result("similar_recipes", backend, rows, ops, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for _ in range(ops):
+            manager.list_flavors()
+        results.append(result("list_flavors", backend, rows, ops, time.perf_counter() - start))
+
+        ui = User_Interaction(manager)
+        start = time.perf_counter()
+        manager.prices(ui.pricing)
+        results.append(result("price_cache_build", backend, rows, rows, time.perf_counter() - start))
+
+        orders = [(manager.exact_match(name), rng.choice((1.0, 2.0, 3.0))) for name in lookups[:ops * 10]]
+        start = time.perf_counter()
+        receipt = ui.new_receipt()
+        for x, (chosen_recipe, size) in enumerate(orders, 1): # one receipt per 50 drinks, like a busy register
+            ui.prepare_receipt(x, receipt, chosen_recipe, size)
+            if x % 50 == 0:
+                ui.print_receipt(receipt)
+                receipt = ui.new_receipt()
+        results.append(result("prepare_receipt", backend, rows, len(orders), time.perf_counter() - start))
+
+        # every plain new_recipe rewrites the whole csv, so keep the count small there
+        adds = 10 if rows >= 100000 else 50
+        start = time.perf_counter()
+        for i in range(adds):
+            manager.new_recipe(Recipe(f"Bench Brew {i}", "Mocha", 2, "Dark", 1, True, False, False))
+        results.append(result("new_recipe", backend, rows, adds, time.perf_counter() - start))
+
+        journaled = Recipe_Manager(path, columnar=columnar, journal=True, journal_limit=ops * 10)
+        start = time.perf_counter()
+        for i in range(ops):
+            journaled.new_recipe(Recipe(f"Journal Brew {i}", "Mocha", 2, "Dark", 1, True, False, False))
+        results.append(result("new_recipe_journal", backend, rows, ops, time.perf_counter() - start))
+    return results
+
+
+def bench_startup(rows, runs=5):
+    # wall time of a whole `recipe_manager.py lookup NAME` process: the first run has to parse the csv
+    # (and compiles the snapshot), every later one should cost the same whatever the catalog size
+    script = os.path.join(os.path.dirname(SEED_FILE), "recipe_manager.py")
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        path = write_catalog(os.path.join(folder, "recipes.csv"), rows)
+        name = next(synthetic_rows(rows))[0] if rows else "Custom coffee"
+        command = [sys.executable, script, "--file", path, "lookup", name]
+        def timed_run():
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            return time.perf_counter() - start
+        results.append(result("startup_first_lookup", "cli", rows, 1, timed_run()))
+        times = sorted(timed_run() for _ in range(runs))
+        results.append(result("startup_lookup", "cli", rows, runs, sum(times), median_ms=round(times[len(times) // 2] * 1000, 2)))
+    return results
+
+
+def compare(results, baseline_file, tolerance=.10): # print the change against an earlier --json run
+    with open(baseline_file, mode='r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    baseline = {(r["bench"], r["backend"], r["rows"]): r for r in baseline["results"]}
+    regressions = 0
+    for entry in results:
+        old = baseline.get((entry["bench"], entry["backend"], entry["rows"]))
+        if not old or not old.get("ops_per_sec") or not entry.get("ops_per_sec"):
+            continue
+        change = entry["ops_per_sec"] / old["ops_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{entry['bench']:<20} {entry['backend']:<9} {entry['rows']:>9} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(SEED_FILE)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recipe_Manager benchmarks")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="catalog sizes to run, e.g. --rows 1000 10000 100000 1000000 10000000")
+    parser.add_argument("--ops", type=int, default=1000, help="base operation count per timed bench")
+    parser.add_argument("--columnar", action="store_true", help="also run every bench on the columnar store")
+    parser.add_argument("--memory", action="store_true", help="also measure bytes per recipe and peak load memory")
+    parser.add_argument("--startup", action="store_true", help="only time headless `lookup` processes (cold start) at each --rows")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    args = parser.parse_args()
+    results = []
+    for rows in args.rows if args.startup else ():
+        for entry in bench_startup(rows):
+            results.append(entry)
+            print(f"{entry['bench']:<20} {entry['backend']:<9} {rows:>9} rows  {entry['seconds'] / entry['ops'] * 1000:>10.1f} ms per process")
+    for rows in args.rows if not args.startup else ():
+        for columnar in ((False, True) if args.columnar else (False,)):
+            for entry in bench_catalog(rows, columnar, args.ops):
+                results.append(entry)
+                print(f"{entry['bench']:<20} {entry['backend']:<9} {rows:>9} rows  {entry['ops_per_sec']:>14,.1f} ops/s")
+            if args.memory:
+                entry = bench_memory(rows, columnar)
+                results.append(entry)
+                print(f"{'memory':<20} {entry['backend']:<9} {rows:>9} rows  {entry['bytes_per_recipe']:>8.1f} B/recipe  peak {entry['peak_bytes'] / 1e6:.1f} MB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({"commit": git_commit(), "results": results}, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
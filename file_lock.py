@@ -0,0 +1,71 @@
+import os
+try:
+    import fcntl
+except ImportError: # windows
+    fcntl = None
+    import msvcrt
+
+
+
+class FileLock:
+    # exclusive lock on a small side file (e.g. recipes.csv.lock) that every process writing the
+    # catalog takes first. the file also holds the catalog version, a counter bumped on every write,
+    # so a process can tell whether anyone else committed since it last read the csv.
+    # re-entrant within one FileLock, so a commit can call save / compact while it holds it.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.depth = 0
+
+    def acquire(self):
+        if self.depth == 0:
+            file = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            self.file = file
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            file, self.file = self.file, None
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            file.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def version(self): # 0 if nothing has been committed yet, None if it can't be read right now
+        try:
+            if self.file is not None:
+                self.file.seek(0)
+                data = self.file.read()
+            else:
+                with open(self.path, 'rb') as file:
+                    data = file.read()
+        except FileNotFoundError:
+            return 0
+        except OSError:
+            return None
+        try:
+            return int(data or 0)
+        except ValueError:
+            return None
+
+    def set_version(self, version): # only while holding the lock
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(str(version).encode('ascii'))
+        self.file.flush()
+        os.fsync(self.file.fileno())
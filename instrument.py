@@ -0,0 +1,171 @@
+import atexit
+import json
+import os
+import sys
+import time
+
+
+
+# off unless turned on: enable() swaps timing wrappers onto the hot paths it's given and disable()
+# puts the original functions back, so a normal run calls exactly the same code as without this module.
+# the only always-there hooks are clock() / record() in the interactive order loop, which waits on input anyway.
+BUCKETS = 40 # latency histogram buckets, bucket n holds calls that took under 2**n microseconds
+
+
+class Metric:
+    __slots__ = ("count", "total", "max", "nbytes", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.nbytes = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds, nbytes=0):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.nbytes += nbytes
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, q): # upper edge (ms) of the bucket holding the q-th fraction of calls
+        wanted = q * self.count
+        seen = 0
+        for n, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(2 ** n / 1000, self.max * 1000)
+        return self.max * 1000
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0,
+            "p50_ms": round(self.percentile(.5), 4),
+            "p99_ms": round(self.percentile(.99), 4),
+            "max_ms": round(self.max * 1000, 4),
+            "bytes": self.nbytes,
+            "histogram_us": {f"<{2 ** n}": count for n, count in enumerate(self.buckets) if count}
+        }
+
+
+class Instruments:
+    def __init__(self):
+        self.metrics = {}
+        self.wrapped = [] # (owner, attribute, original) to put back on disable
+        self.profiler = None
+
+    def record(self, name, seconds, nbytes=0):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = Metric()
+        metric.add(seconds, nbytes)
+
+    def wrap(self, owner, attribute, nbytes=None):
+        # time every call of owner.attribute; nbytes(args, result) says how many bytes it moved
+        original = owner.__dict__[attribute]
+        name = f"{owner.__name__}.{attribute}"
+        record = self.record
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                result = original(*args, **kwargs)
+            except BaseException:
+                record(name, clock() - start)
+                raise
+            seconds = clock() - start
+            record(name, seconds, nbytes(args, result) if nbytes is not None else 0)
+            return result
+
+        timed.__name__ = original.__name__
+        timed.__doc__ = original.__doc__
+        setattr(owner, attribute, timed)
+        self.wrapped.append((owner, attribute, original))
+
+    def unwrap(self):
+        for owner, attribute, original in reversed(self.wrapped):
+            setattr(owner, attribute, original)
+        self.wrapped = []
+
+    def start_profile(self):
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def summary(self):
+        return {name: metric.to_dict() for name, metric in sorted(self.metrics.items())}
+
+    def print_table(self, file=None):
+        file = file or sys.stderr
+        lines = [f"{'hot path':<34} {'calls':>9} {'total ms':>11} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'bytes':>12}"]
+        for name, entry in self.summary().items():
+            lines.append(
+                f"{name:<34} {entry['count']:>9} {entry['total_ms']:>11.2f} {entry['mean_ms']:>9.3f} {entry['p50_ms']:>9.3f} "
+                f"{entry['p99_ms']:>9.3f} {entry['max_ms']:>9.3f} {entry['bytes']:>12}"
+            )
+        file.write("\n".join(lines) + "\n")
+
+    def finish(self, report="table", profile=None):
+        # report: "table" (stderr), "json" (stderr) or a file name to write JSON to; profile: cProfile output file
+        if self.profiler is not None:
+            self.profiler.disable()
+            if profile:
+                self.profiler.dump_stats(profile)
+        if report == "table":
+            self.print_table()
+        elif report == "json":
+            sys.stderr.write(json.dumps(self.summary()) + "\n")
+        elif report:
+            with open(report, 'w', encoding='utf-8') as file:
+                json.dump(self.summary(), file, indent=2)
+
+
+metrics = None # the active Instruments, None while instrumentation is off
+
+
+def enable(hot_paths=(), report="table", profile=None, at_exit=True):
+    # hot_paths is a list of (owner, attribute, nbytes or None); the report is written on exit
+    global metrics
+    if metrics is not None:
+        return metrics
+    metrics = Instruments()
+    for owner, attribute, nbytes in hot_paths:
+        metrics.wrap(owner, attribute, nbytes)
+    if profile:
+        metrics.start_profile()
+    if at_exit:
+        atexit.register(metrics.finish, report, profile)
+    return metrics
+
+
+def disable():
+    global metrics
+    if metrics is not None:
+        metrics.unwrap()
+        if metrics.profiler is not None:
+            metrics.profiler.disable()
+    metrics = None
+
+
+def from_env(hot_paths=(), environ=None):
+    # COFFEE_INSTRUMENT=table|json|<file.json> turns timers on, COFFEE_PROFILE=<file.prof> adds a cProfile capture
+    environ = os.environ if environ is None else environ
+    report = environ.get("COFFEE_INSTRUMENT")
+    profile = environ.get("COFFEE_PROFILE")
+    if report or profile:
+        return enable(hot_paths, report if report not in ("1", "true", "yes") else "table", profile)
+    return None
+
+
+def clock(): # start of a span for record(), just 0 when instrumentation is off
+    return time.perf_counter() if metrics is not None else 0.0
+
+
+def record(name, start, nbytes=0):
+    if metrics is not None:
+        metrics.record(name, time.perf_counter() - start, nbytes)
@@ -0,0 +1,131 @@
+import json
+import math
+import os
+import time
+
+
+
+# ingredients are keyed "syrup:<flavor>", "roast:<roast>", "creamer" and "sugar" and counted in the
+# same units the receipt prices: pumps, espresso shots, creamers (3 per size step for lattes) and sugars
+def ingredient_keys(row): # (key, amount) used by one order log row
+    when, name, flavor, roast, size, pump, shot, creamer, sugar, cents = row
+    if flavor and pump:
+        yield f"syrup:{flavor}", pump
+    if roast and shot:
+        yield f"roast:{roast}", shot
+    if creamer:
+        yield "creamer", creamer
+    if sugar:
+        yield "sugar", sugar
+
+
+class Inventory:
+    # stock levels plus a decayed usage total per ingredient, so the recent usage rate and the
+    # run-out time of any ingredient come from three numbers without looking back at old orders.
+    # usage decays with time constant `horizon` seconds: an order an hour old counts about 1/e as much
+    # as one just now (with the default), so forecasts follow the current rush rather than the day's average.
+    def __init__(self, filename="inventory.json", horizon=3600, save_every=1000):
+        self.filename = filename
+        self.horizon = horizon
+        self.save_every = save_every # orders between automatic saves, see deplete
+        self.unsaved = 0
+        self.stock = {} # key -> units on hand (negative = used more than was stocked)
+        self.usage = {} # key -> [decayed units used, time of last use]
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.filename, mode='r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        self.horizon = data.get("horizon", self.horizon)
+        self.stock = data.get("stock", {})
+        self.usage = data.get("usage", {})
+
+    def save(self): # atomic, like save_recipe
+        temp_name = self.filename + ".tmp"
+        with open(temp_name, mode='w', encoding='utf-8') as file:
+            json.dump({"horizon": self.horizon, "stock": self.stock, "usage": self.usage}, file)
+        os.replace(temp_name, self.filename)
+        self.unsaved = 0
+
+    def restock(self, key, amount): # add to what is on hand
+        self.stock[key] = self.stock.get(key, 0) + amount
+
+    def set_level(self, key, amount):
+        self.stock[key] = amount
+
+    def deplete(self, rows):
+        # take a batch of order log rows off the stock. amounts are summed per ingredient first so a
+        # big batch costs one update per ingredient it touches, not one per order
+        totals = {}
+        latest = {}
+        count = 0
+        for row in rows:
+            count += 1
+            when = row[0]
+            for key, amount in ingredient_keys(row):
+                totals[key] = totals.get(key, 0) + amount
+                if key not in latest or when > latest[key]:
+                    latest[key] = when
+        for key, amount in totals.items():
+            self.stock[key] = self.stock.get(key, 0) - amount
+            self.record_use(key, amount, latest[key])
+        self.unsaved += count
+        if self.save_every and self.unsaved >= self.save_every:
+            self.save()
+        return count
+
+    def record_use(self, key, amount, when):
+        usage = self.usage.get(key)
+        if usage is None:
+            self.usage[key] = [amount, when]
+            return
+        used, last = usage
+        if when >= last:
+            usage[0] = used * math.exp((last - when) / self.horizon) + amount
+            usage[1] = when
+        else: # replayed or late order, decay it to the newer time instead
+            usage[0] = used + amount * math.exp((when - last) / self.horizon)
+
+    # queries, each O(1) per ingredient
+
+    def level(self, key):
+        return self.stock.get(key, 0)
+
+    def rate(self, key, now=None): # recent units used per hour
+        usage = self.usage.get(key)
+        if usage is None:
+            return 0.0
+        now = time.time() if now is None else now
+        used, last = usage
+        return used * math.exp(min(last - now, 0) / self.horizon) / self.horizon * 3600
+
+    def runs_out(self, key, now=None): # unix time the ingredient runs out at the recent rate, None if unused
+        now = time.time() if now is None else now
+        rate = self.rate(key, now)
+        if rate <= 0:
+            return None
+        return now + max(self.level(key), 0) / rate * 3600
+
+    def forecast(self, now=None): # every ingredient, soonest to run out first
+        now = time.time() if now is None else now
+        report = []
+        for key in sorted(set(self.stock) | set(self.usage)):
+            runs_out = self.runs_out(key, now)
+            report.append({
+                "ingredient": key,
+                "level": self.level(key),
+                "per_hour": round(self.rate(key, now), 2),
+                "runs_out": runs_out,
+                "hours_left": None if runs_out is None else round((runs_out - now) / 3600, 2)
+            })
+        report.sort(key=lambda entry: (entry["hours_left"] is None, entry["hours_left"] or 0))
+        return report
+
+    def print_forecast(self, now=None):
+        print(f"{'Ingredient':<32} {'On hand':>10} {'Per hour':>10} {'Hours left':>11}")
+        for entry in self.forecast(now):
+            hours = "-" if entry["hours_left"] is None else f"{entry['hours_left']:.1f}"
+            print(f"{entry['ingredient']:<32} {entry['level']:>10} {entry['per_hour']:>10.2f} {hours:>11}")
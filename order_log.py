@@ -0,0 +1,64 @@
+import csv
+import os
+import time
+
+
+
+# append-only log of completed orders, one short csv line per drink:
+#   time, name, flavor, roast, size, pump, shot, creamer, sugar, subtotal in cents
+# times are whole unix seconds and money is whole cents so every field stays a small int
+LOG_FIELDS = ["time", "name", "flavor", "roast", "size", "pump", "shot", "creamer", "sugar", "cents"]
+
+
+def order_row(chosen_recipe, size, price, when):
+    # chosen_recipe is the list exact_match returns, price a dict like PricingEngine.price_one returns
+    return [
+        int(when), chosen_recipe[0], chosen_recipe[1] or '', chosen_recipe[3] or '', int(size),
+        int(price["pump"]), int(price["shot"]), int(price["creamer"]), int(price["sugar"]),
+        round(price["subtotal"] * 100)
+    ]
+
+
+def order_rows(orders, pricing, when=None):
+    # orders is a list of (chosen_recipe, size) like main_nav collects; canceled lines are left out
+    orders = [(chosen_recipe, size) for chosen_recipe, size in orders if chosen_recipe[0] != "Canceled"]
+    if not orders:
+        return []
+    when = time.time() if when is None else when
+    batch = pricing.price_batch(orders)
+    rows = []
+    for i, (chosen_recipe, size) in enumerate(orders):
+        price = {field: float(batch[field][i]) for field in ("pump", "shot", "creamer", "sugar", "subtotal")}
+        rows.append(order_row(chosen_recipe, size, price, when))
+    return rows
+
+
+class OrderLog:
+    def __init__(self, filename="orders.log"):
+        self.filename = filename
+
+    def append(self, rows): # one write (and fsync) per batch of orders
+        if not rows:
+            return 0
+        with open(self.filename, mode='a', newline='', encoding='utf-8') as file:
+            csv.writer(file).writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        return len(rows)
+
+    def __iter__(self): # streams (time, name, flavor, roast, size, pump, shot, creamer, sugar, cents)
+        try:
+            file = open(self.filename, mode='r', newline='', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with file:
+            for row in csv.reader(file):
+                if len(row) < 10:
+                    continue # torn last line from a crash mid-write
+                try:
+                    yield (
+                        int(row[0]), row[1], row[2], row[3], int(row[4]),
+                        int(row[5]), int(row[6]), int(row[7]), int(row[8]), int(row[9])
+                    )
+                except ValueError:
+                    continue
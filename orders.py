@@ -0,0 +1,162 @@
+import json
+import sys
+import time
+
+from order_log import order_row
+from pricing import SIZE_NAMES
+from schema import RowError, ingest
+
+
+
+SIZES = {
+    "1": 1, "s": 1, "sm": 1, "small": 1,
+    "2": 2, "m": 2, "med": 2, "medium": 2,
+    "3": 3, "l": 3, "lg": 3, "large": 3
+}
+
+
+def parse_size(size): # same choices as the size menu in main_nav, anything else is a small
+    return SIZES.get(str(size).strip().lower(), 1)
+
+
+class OrderSession:
+    # prices orders without the interactive menus. an order is a dict with "size" and either
+    # "recipe" (a saved recipe name) or "custom" (flavor, pumps, roast, shots, creamer, sugar, iced)
+    def __init__(self, recipe_manager, pricing=None, order_log=None, inventory=None):
+        self.recipe_manager = recipe_manager
+        self.prices = recipe_manager.prices(pricing) # saved recipes are a lookup in the catalog's price matrix
+        self.pricing = self.prices.pricing
+        self.order_log = order_log # every priced order is appended here, one write per batch
+        self.inventory = inventory # and taken out of stock here, one update per ingredient per batch
+        self.count = 0
+        self.subtotal = 0.0
+
+    def resolve(self, order):
+        # order -> chosen_recipe list like exact_match returns, or None for an unknown recipe;
+        # raises RowError for a custom drink whose fields don't fit the recipe schema
+        if "custom" in order:
+            custom = order["custom"]
+            if not isinstance(custom, dict):
+                raise RowError(None, None, "must be an object of recipe fields")
+            value = lambda field: ingest.convert_value(field, custom.get(field))
+            pumps = value("pumps")
+            shots = value("shots")
+            return [
+                value("name") or "Custom coffee",
+                value("flavor") or '',
+                '' if pumps is None else pumps,
+                value("roast") or '',
+                '' if shots is None else shots,
+                value("creamer"),
+                value("sugar"),
+                value("iced")
+            ]
+        recipe = self.recipe_manager.find_recipe(order.get("recipe") or '')
+        if recipe is None:
+            return None
+        return recipe.list_recipe()
+
+    def add(self, order): # price one order and return its receipt
+        return next(self.process([order]))
+
+    def process(self, orders, batch_size=10000): # yields one receipt dict per order, in order
+        batch = []
+        for order in orders:
+            batch.append(order)
+            if len(batch) >= batch_size:
+                yield from self.price(batch)
+                batch = []
+        if batch:
+            yield from self.price(batch)
+
+    def price(self, orders):
+        resolved = []
+        receipts = []
+        for order in orders:
+            self.count += 1
+            problem = order_problem(order)
+            if problem is not None:
+                receipts.append({"order": self.count, "error": problem})
+                continue
+            try:
+                chosen_recipe = self.resolve(order)
+            except RowError as e:
+                receipts.append({"order": self.count, "error": f"custom drink: {e}"})
+                continue
+            if chosen_recipe is None:
+                receipts.append({"order": self.count, "error": f"unknown recipe '{order.get('recipe')}'"})
+                continue
+            size = parse_size(order.get("size", 1))
+            receipt = {"order": self.count, "name": chosen_recipe[0], "size": SIZE_NAMES[size]}
+            receipts.append(receipt)
+            resolved.append((receipt, chosen_recipe, size))
+        if resolved:
+            logged = []
+            when = time.time()
+            lookup = self.prices.lookup
+            for receipt, chosen_recipe, size in resolved:
+                price = lookup(chosen_recipe, size)
+                for field in ("pump", "shot", "creamer", "sugar"):
+                    receipt[field] = int(price[field])
+                receipt["subtotal"] = round(price["subtotal"], 2)
+                self.subtotal += price["subtotal"]
+                if self.order_log is not None or self.inventory is not None:
+                    logged.append(order_row(chosen_recipe, size, price, when))
+            if logged and self.order_log is not None:
+                self.order_log.append(logged)
+            if logged and self.inventory is not None:
+                self.inventory.deplete(logged)
+        return receipts
+
+    def close(self): # totals for everything priced so far
+        tip, total = self.pricing.totals(self.subtotal)
+        return {
+            "orders": self.count,
+            "subtotal": round(self.subtotal, 2),
+            "tip": round(tip, 2),
+            "total": round(total, 2)
+        }
+
+
+class BadLine:
+    # stands in for a line of the orders stream that isn't JSON, so it gets an error receipt in its place
+    def __init__(self, message):
+        self.message = message
+
+
+def order_problem(order): # why an order can't be priced at all, None if it has the shape resolve expects
+    if isinstance(order, BadLine):
+        return f"not JSON: {order.message}"
+    if not isinstance(order, dict):
+        return "order must be an object with \"recipe\" or \"custom\""
+    if "custom" not in order and not isinstance(order.get("recipe") or '', str):
+        return "recipe must be a recipe name"
+    return None
+
+
+def read_orders(file): # one JSON value per line, blank lines ignored
+    for line in file:
+        line = line.strip()
+        if line:
+            try:
+                order = json.loads(line)
+            except ValueError as e:
+                order = BadLine(str(e))
+            yield order
+
+
+def run_orders(recipe_manager, source="-", out=None, order_log=None, inventory=None):
+    # stream receipts for every order in source (a JSONL path or "-" for stdin) as JSONL
+    out = out or sys.stdout
+    session = OrderSession(recipe_manager, order_log=order_log, inventory=inventory)
+    file = sys.stdin if source == "-" else open(source, mode='r', encoding='utf-8')
+    try:
+        write = out.write
+        dumps = json.dumps
+        for receipt in session.process(read_orders(file)):
+            write(dumps(receipt) + "\n")
+        write(dumps({"summary": session.close()}) + "\n")
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    return session
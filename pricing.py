@@ -0,0 +1,227 @@
+from array import array
+from collections import OrderedDict
+from types import MappingProxyType
+
+
+
+PRICE_TABLE = {
+    "size": 1.0, # per size step (Sm = 1, Med = 2, Lg = 3)
+    "pump": .25,
+    "shot": .5,
+    "creamer": .1, # per creamer, one per size step
+    "sugar": .05, # per sugar, one per size step
+    "latte_creamer": 3, # lattes are basically just coffee milk :p
+    "tip": .2
+}
+
+SIZE_NAMES = {0: "", 1: "Sm", 2: "Med", 3: "Lg"}
+
+PRICE_FIELDS = (
+    "size", "pump", "shot", "creamer", "sugar",
+    "size_total", "pump_total", "shot_total", "creamer_total", "sugar_total", "subtotal"
+)
+
+NUMPY_MIN_BATCH = 64 # smaller batches price faster on plain arrays than they convert to numpy
+
+numpy_module = None
+numpy_checked = False
+
+
+def load_numpy(): # numpy if it's installed, imported the first time a batch is big enough to want it
+    global numpy_module, numpy_checked
+    if not numpy_checked:
+        numpy_checked = True
+        try:
+            import numpy
+            numpy_module = numpy
+        except ImportError: # everything below also works on plain arrays, just slower for big batches
+            numpy_module = None
+    return numpy_module
+
+
+class PricingEngine:
+    # prices whole batches of (chosen_recipe, size) orders column by column.
+    # chosen_recipe is the list exact_match returns (or the custom/canceled lists main_nav builds)
+    def __init__(self, prices=None):
+        # read-only, so every change goes through set_prices and bumps version
+        self.prices = MappingProxyType(dict(PRICE_TABLE, **(prices or {})))
+        self.version = 0 # bumped by set_prices, so a PriceCache knows its prices are stale
+
+    def set_prices(self, prices): # change some of the price table, e.g. {"shot": .75}
+        self.prices = MappingProxyType(dict(self.prices, **prices))
+        self.version += 1
+
+    def columns(self, orders): # split orders into one array per quantity
+        sizes, pumps, shots, creamers, sugars, lattes = (array('d') for _ in range(6))
+        for chosen_recipe, size in orders:
+            sizes.append(float(size))
+            pumps.append(0.0 if chosen_recipe[2] == '' else float(chosen_recipe[2]))
+            shots.append(0.0 if chosen_recipe[4] == '' else float(chosen_recipe[4]))
+            creamers.append(1.0 if chosen_recipe[5] == True else 0.0)
+            sugars.append(1.0 if chosen_recipe[6] == True else 0.0)
+            lattes.append(1.0 if "latte" in chosen_recipe[0].lower() else 0.0)
+        return sizes, pumps, shots, creamers, sugars, lattes
+
+    def price_batch(self, orders):
+        # returns per-order quantities and line totals plus the batch subtotal, tip and total
+        sizes, pumps, shots, creamers, sugars, lattes = self.columns(orders)
+        prices = self.prices
+        np = load_numpy() if len(sizes) >= NUMPY_MIN_BATCH else None
+        if np is not None:
+            sizes, pumps, shots, creamers, sugars, lattes = (
+                np.frombuffer(column, dtype=np.float64) for column in (sizes, pumps, shots, creamers, sugars, lattes)
+                )
+            creamer = np.where(creamers > 0, np.where(lattes > 0, sizes * prices["latte_creamer"], sizes), 0.0)
+            sugar = np.where(sugars > 0, sizes, 0.0)
+            size_total = sizes * prices["size"]
+            pump_total = pumps * prices["pump"]
+            shot_total = shots * prices["shot"]
+            creamer_total = creamer * prices["creamer"]
+            sugar_total = sugar * prices["sugar"]
+            subtotal = size_total + pump_total + shot_total + creamer_total + sugar_total
+        else:
+            latte_creamer = prices["latte_creamer"]
+            creamer = array('d', (
+                (s * latte_creamer if l else s) if c else 0.0 for s, c, l in zip(sizes, creamers, lattes)
+                ))
+            sugar = array('d', (s if c else 0.0 for s, c in zip(sizes, sugars)))
+            size_total = array('d', (s * prices["size"] for s in sizes))
+            pump_total = array('d', (p * prices["pump"] for p in pumps))
+            shot_total = array('d', (s * prices["shot"] for s in shots))
+            creamer_total = array('d', (c * prices["creamer"] for c in creamer))
+            sugar_total = array('d', (s * prices["sugar"] for s in sugar))
+            subtotal = array('d', (a + b + c + d + e for a, b, c, d, e in zip(size_total, pump_total, shot_total, creamer_total, sugar_total)))
+        batch_subtotal = 0.0
+        for amount in subtotal: # same running sum main_nav keeps in grand_total
+            batch_subtotal += amount
+        tip, total = self.totals(batch_subtotal)
+        return {
+            "size": sizes, "pump": pumps, "shot": shots, "creamer": creamer, "sugar": sugar,
+            "size_total": size_total, "pump_total": pump_total, "shot_total": shot_total,
+            "creamer_total": creamer_total, "sugar_total": sugar_total, "subtotal": subtotal,
+            "batch_subtotal": batch_subtotal, "tip": tip, "total": total
+        }
+
+    def price_one(self, chosen_recipe, size): # one order, as plain floats
+        batch = self.price_batch([(chosen_recipe, size)])
+        return {
+            field: float(values[0]) for field, values in batch.items() if field not in ("batch_subtotal", "tip", "total")
+        }
+
+    def totals(self, subtotal):
+        tip = subtotal * self.prices["tip"]
+        return tip, subtotal + tip
+
+
+def price_profile(chosen_recipe):
+    # everything a drink's price depends on besides its size, the same way columns() reads it
+    return (
+        "latte" in chosen_recipe[0].lower(),
+        0.0 if chosen_recipe[2] == '' else float(chosen_recipe[2]),
+        0.0 if chosen_recipe[4] == '' else float(chosen_recipe[4]),
+        chosen_recipe[5] == True,
+        chosen_recipe[6] == True
+    )
+
+
+class PriceCache:
+    # price_one as a table lookup instead of a fresh price_batch per drink.
+    # the catalog half is a recipe x size matrix: one row per name key (what Recipe_Manager.name_key gives),
+    # filled by the manager as recipes are stored and dropped as they are deleted. a row keeps the fields it
+    # was priced from, so a custom drink that only shares a saved recipe's name is never given its price.
+    # rows share one tuple of per-size prices per distinct profile (see price_profile), so a catalog has a
+    # handful of price tuples however many recipes it has, and set_prices reprices just those, in one batch.
+    # anything not in the catalog goes through a bounded LRU keyed on its profile
+    def __init__(self, pricing=None, custom_limit=1024):
+        self.pricing = pricing or PricingEngine()
+        self.version = self.pricing.version
+        self.matrix = {} # name key -> (pumps, shots, creamer, sugar as list_recipe gives them, profile, prices per size)
+        self.profiles = {} # profile -> prices per size (index 0-3), for every profile in the matrix
+        self.custom = OrderedDict() # profile -> prices per size, least recently used first
+        self.custom_limit = custom_limit
+
+    @property
+    def prices(self):
+        return self.pricing.prices
+
+    def totals(self, subtotal):
+        return self.pricing.totals(subtotal)
+
+    def price_batch(self, orders): # whole batches are already vectorized, leave them to the engine
+        return self.pricing.price_batch(orders)
+
+    def price_sizes(self, profiles): # prices per size for each profile, all in one price_batch
+        orders = []
+        for latte, pumps, shots, creamer, sugar in profiles:
+            chosen_recipe = ["latte" if latte else "", '', pumps, '', shots, creamer, sugar, False]
+            orders.extend((chosen_recipe, size) for size in range(len(SIZE_NAMES)))
+        if not orders:
+            return []
+        batch = self.pricing.price_batch(orders)
+        columns = [batch[field] for field in PRICE_FIELDS]
+        prices = [dict(zip(PRICE_FIELDS, (float(column[i]) for column in columns))) for i in range(len(orders))]
+        return [tuple(prices[i:i + len(SIZE_NAMES)]) for i in range(0, len(prices), len(SIZE_NAMES))]
+
+    def add(self, key, recipe): # price one catalog recipe, called by the manager as it stores it
+        chosen_recipe = recipe.list_recipe()
+        profile = price_profile(chosen_recipe)
+        sizes = self.profiles.get(profile)
+        if sizes is None:
+            sizes = self.profiles[profile] = self.custom.pop(profile, None) or self.price_sizes([profile])[0]
+        self.matrix[key] = (chosen_recipe[2], chosen_recipe[4], chosen_recipe[5], chosen_recipe[6], profile, sizes)
+
+    def add_many(self, items): # (key, recipe) pairs, new profiles priced in one batch
+        rows = []
+        new = {}
+        for key, recipe in items:
+            chosen_recipe = recipe.list_recipe()
+            profile = price_profile(chosen_recipe)
+            if profile not in self.profiles:
+                new[profile] = None
+            rows.append((key, chosen_recipe, profile))
+        self.profiles.update(zip(new, self.price_sizes(new)))
+        profiles = self.profiles
+        self.matrix.update(
+            (key, (chosen_recipe[2], chosen_recipe[4], chosen_recipe[5], chosen_recipe[6], profile, profiles[profile]))
+            for key, chosen_recipe, profile in rows
+        )
+
+    def discard(self, key): # the profile's prices stay, other recipes (or the next add) likely share them
+        self.matrix.pop(key, None)
+
+    def clear_catalog(self): # the manager is reloading the catalog
+        self.matrix = {}
+        self.profiles = {}
+
+    def reprice(self): # the price table changed: reprice every profile the catalog uses, forget the rest
+        self.profiles = dict(zip(self.profiles, self.price_sizes(self.profiles)))
+        profiles = self.profiles
+        self.matrix = {key: row[:5] + (profiles[row[4]],) for key, row in self.matrix.items()}
+        self.custom.clear()
+        self.version = self.pricing.version
+
+    def lookup(self, chosen_recipe, size):
+        # the shared price dict for one drink, don't change it (price_one returns a copy)
+        if self.version != self.pricing.version:
+            self.reprice()
+        size = int(size)
+        if not 0 <= size <= 3: # not a size the matrix holds
+            return self.pricing.price_one(chosen_recipe, size)
+        row = self.matrix.get(chosen_recipe[0].casefold())
+        if (row is not None and row[0] == chosen_recipe[2] and row[1] == chosen_recipe[4]
+                and row[2] == chosen_recipe[5] and row[3] == chosen_recipe[6]):
+            return row[5][size]
+        profile = price_profile(chosen_recipe) # raises ValueError for non-numeric pumps/shots, like price_batch
+        sizes = self.profiles.get(profile)
+        if sizes is None:
+            sizes = self.custom.get(profile)
+            if sizes is None:
+                sizes = self.custom[profile] = self.price_sizes([profile])[0]
+                if len(self.custom) > self.custom_limit:
+                    self.custom.popitem(last=False)
+            else:
+                self.custom.move_to_end(profile)
+        return sizes[size]
+
+    def price_one(self, chosen_recipe, size): # same dict PricingEngine.price_one returns
+        return dict(self.lookup(chosen_recipe, size))
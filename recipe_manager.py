@@ -1,19 +1,44 @@
+import argparse
 import csv
+import instrument
+import json
 import os
-from colors import *
+import sys
+from array import array
+from itertools import compress
+from operator import attrgetter
+from analytics import parse_time, run_report
+from colors import borange, bteal, default, green, orange, pink, teal, yellow
+from file_lock import FileLock
+from inventory import Inventory
+from order_log import OrderLog, order_rows
+from orders import parse_size, run_orders
+from pricing import PriceCache, PricingEngine
+from recipe_table import RecipeTable
+from render import Receipt, Renderer, pick_style
+from schema import FIELDNAMES, IngestReport, RowError, ingest, read_recipes, to_count
+from search_index import SearchIndex
+from shards import find_shards, is_sharded, read_shards
+from similar import SimilarIndex
+from snapshot import Snapshot, read_source_stamp, write_snapshot
+from sorted_view import SORTS, SortedView
+from storage import SQLiteStorage, is_sqlite
 
 
 
 class Recipe:
+    __slots__ = ("name", "flavor", "pumps", "roast", "shots", "creamer", "sugar", "iced")
+
     def __init__(self, name, flavor=None, pumps: int=None, roast=None, shots: int=None, creamer=False, sugar=False, iced=False):
         self.name = name
         self.flavor = flavor
         self.pumps = pumps
         self.roast = roast
         self.shots = shots
-        self.creamer = str(creamer).lower() in ('true','1')
-        self.sugar = str(sugar).lower() in ('true','1')
-        self.iced = str(iced).lower() in ('true','1')
+        # already bools when they come from the schema (see schema.py), anything else is coerced
+        self.creamer = creamer if creamer is True or creamer is False else str(creamer).lower() in ('true','1')
+        self.sugar = sugar if sugar is True or sugar is False else str(sugar).lower() in ('true','1')
+        self.iced = iced if iced is True or iced is False else str(iced).lower() in ('true','1')
     
     def list_recipe(self):
         return [
@@ -26,126 +51,849 @@ class Recipe:
             self.sugar,
             self.iced
         ]
+
+    def to_dict(self): # json record; unlike list_recipe, unset fields stay None (null)
+        return {field: getattr(self, field) for field in self.__slots__}
     
+def name_key(name): # case-folded key used for every name comparison
+    return name.casefold() if name else ''
+
 class Recipe_Manager:
-    def __init__(self, filename="recipes.csv"):
+    FLAGS = ("creamer", "sugar", "iced")
+
+    OFFSET_STEP = 256 # rows between byte-offset checkpoints, so read_rows skips at most this many to reach a page
+
+    def __init__(self, filename="recipes.csv", journal=False, journal_limit=1000, columnar=False, lazy=False, storage=None, snapshot=False, workers=None):
         self.filename = filename
-        self.recipes = []
-        self.load_recipes()
-        self.FIELDNAMES = [
-        "name", "flavor", "pumps", "roast", "shots", "creamer", "sugar", "iced"
-        ]
+        # a storage backend (see storage.py) answers queries itself instead of the in-memory indexes;
+        # a .db/.sqlite filename gets a SQLiteStorage automatically
+        if storage is None and is_sqlite(filename):
+            storage = SQLiteStorage(filename, Recipe, name_key)
+        self.storage = storage
+        # a folder or glob of csvs is loaded shard by shard in worker processes and merged (read-only)
+        self.sharded = storage is None and is_sharded(filename)
+        self.workers = workers
+        self.conflicts = [] # duplicate names dropped while merging shards
+        if self.sharded:
+            journal = False
+        self.lazy = lazy # don't parse the catalog until something needs the whole thing
+        self.loaded = False
+        self.columnar = columnar # keep recipes in a RecipeTable instead of a list of Recipe objects
+        self.journal = journal # append mutations to a log instead of rewriting the csv each time
+        self.journal_name = filename + ".log"
+        self.journal_limit = journal_limit # compact the log into the csv after this many entries
+        self.journal_count = 0
+        self.file_stamp = None # (mtime, size) of the csv and journal as of the last load/save
+        self.reload_count = 0 # times refresh() had to reparse because the files changed on disk
+        # writers take this lock and check the catalog version it holds before committing, so two
+        # registers on one csv merge their changes instead of the last save wiping out the other's
+        self.lock = FileLock(filename + ".lock") if storage is None and not self.sharded else None
+        self.version = 0 # catalog version our copy was read at
+        self.merge_count = 0 # commits that found another process's changes and merged them first
+        self.offsets = array('Q') # byte offset of every OFFSET_STEP-th row load_recipes keeps
+        self.offsets_stamp = None
+        self.offsets_done = False
+        self.offsets_position = None # byte offset the checkpoint scan has reached
+        self.offsets_count = 0 # rows load_recipes keeps before offsets_position
+        self.offsets_keys = set() # their name keys, to tell which later rows are duplicates
+        self.offsets_skipped = set() # byte offsets of scanned rows load_recipes leaves out (blank, invalid, duplicate)
+        self.use_snapshot = snapshot and storage is None and not self.sharded # mmap a compiled copy of the csv for lookups at startup
+        self.snapshot_name = filename + ".snap"
+        self.snapshot = None
+        self.recipes = self.new_store()
+        self.FIELDNAMES = list(FIELDNAMES)
+        self.ingest_report = None # IngestReport of the last csv parse: rows read, loaded and rejected, and why
+        self.rejected_rows = [] # csv rows that failed the schema or repeat a name, written back by save_recipe so a save never drops them
+        self.price_cache = None # PriceCache kept in step with the catalog once prices() is asked for
+        self.reset_indexes()
+        if self.use_snapshot and self.open_snapshot():
+            return
+        if not lazy:
+            self.load_recipes()
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load_recipes()
+
+    def ensure_readable(self): # like ensure_loaded, but an up to date snapshot is good enough for lookups
+        if not self.loaded and self.snapshot is None:
+            self.load_recipes()
+
+    def on_snapshot(self):
+        return not self.loaded and self.snapshot is not None
+
+    def open_snapshot(self): # use the snapshot if it was built from the csv as it is now
+        source = self.read_stamp()[0]
+        if source is None or self.journal_pending() or read_source_stamp(self.snapshot_name) != source:
+            return False
+        self.snapshot = Snapshot(self.snapshot_name, Recipe, name_key)
+        self.recipes = self.snapshot
+        return True
+
+    def close_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def new_store(self):
+        if not self.columnar:
+            return []
+        return RecipeTable(Recipe)
+
+    def reset_indexes(self):
+        # name_index holds the stored recipe (a Recipe, or a RecipeTable row id); the secondary
+        # indexes only hold name keys so a columnar store isn't undone by per-recipe objects
+        self.name_index = {} # name key -> recipe / row id
+        self.flavor_index = {} # flavor -> {name key: None}, kept in catalog order
+        self.roast_index = {} # roast -> {name key: None}
+        self.flag_index = {flag: {} for flag in self.FLAGS} # flag -> {name key: None} where flag is True
+        self.search_index = None # SearchIndex of name and flavor trigrams, built the first time a search needs it
+        self.sorted_views = {} # sort -> SortedView, built the first time a page in that order is asked for
+        self.similar_index = None # SimilarIndex, built the first time similar drinks are asked for
+        if self.price_cache is not None:
+            self.price_cache.clear_catalog()
+
+    def store_recipe(self, recipe): # append and index, returns False if the name is already taken
+        if self.storage is not None:
+            return self.storage.add(recipe)
+        key = name_key(recipe.name)
+        if key in self.name_index:
+            return False
+        if self.columnar:
+            self.name_index[key] = self.recipes.append(recipe)
+        else:
+            self.recipes.append(recipe)
+            self.name_index[key] = recipe
+        if recipe.flavor:
+            self.flavor_index.setdefault(recipe.flavor, {})[key] = None
+        if recipe.roast:
+            self.roast_index.setdefault(recipe.roast, {})[key] = None
+        for flag in self.FLAGS:
+            if getattr(recipe, flag):
+                self.flag_index[flag][key] = None
+        if self.search_index is not None:
+            self.search_index.add(key, recipe.flavor)
+        for view in self.sorted_views.values():
+            view.add(recipe, key)
+        if self.similar_index is not None:
+            self.similar_index.add(key, recipe)
+        if self.price_cache is not None:
+            self.price_cache.add(key, recipe)
+        return True
+
+    def store_loaded(self, recipes):
+        # store_recipe for a whole load into an empty store: names are checked and stored row by row, then
+        # the flavor / roast / flag indexes are built a column at a time instead of per recipe.
+        # rows whose name is taken, or that the store can't hold, go in rejected_rows so a save keeps them
+        name_index = self.name_index
+        columnar = self.columnar
+        append = self.recipes.append
+        kept = []
+        for recipe in recipes:
+            key = recipe.name.casefold() # name_key, the schema never lets a blank name through
+            if key in name_index:
+                print(f"ERROR: skipped '{recipe.name}' (Duplicate name, kept in the file, not loaded)")
+                self.rejected_rows.append(recipe.list_recipe()) # so a save doesn't delete it
+            elif not columnar:
+                name_index[key] = recipe
+            else:
+                try:
+                    name_index[key] = append(recipe)
+                except ValueError as e: # the store can't hold it (see RecipeTable.append), keep it in the file
+                    print(f"ERROR: skipped '{recipe.name}' ({e})")
+                    self.rejected_rows.append(recipe.list_recipe())
+                    continue
+                kept.append(recipe)
+        if not columnar:
+            kept = list(name_index.values())
+            self.recipes.extend(kept)
+        keys = list(name_index)
+        for index, field in ((self.flavor_index, "flavor"), (self.roast_index, "roast")):
+            groups = {} # value -> name keys, values in order of first appearance like store_recipe leaves them
+            for key, value in zip(keys, map(attrgetter(field), kept)):
+                if value:
+                    group = groups.get(value)
+                    if group is None:
+                        group = groups[value] = []
+                    group.append(key)
+            for value, group in groups.items():
+                index[value] = dict.fromkeys(group)
+        for flag in self.FLAGS:
+            self.flag_index[flag] = dict.fromkeys(compress(keys, map(attrgetter(flag), kept)))
+        if self.price_cache is not None:
+            self.price_cache.add_many(zip(keys, kept))
+
+    def unindex_recipe(self, recipe):
+        if self.storage is not None: # the backend already dropped it
+            return
+        key = name_key(recipe.name)
+        if self.name_index.pop(key, None) is None:
+            return
+        for index, value in ((self.flavor_index, recipe.flavor), (self.roast_index, recipe.roast)):
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket: # drop empty buckets so list_flavors stays accurate
+                    del index[value]
+        for flag in self.FLAGS:
+            self.flag_index[flag].pop(key, None)
+        if self.search_index is not None:
+            self.search_index.remove(key)
+        for view in self.sorted_views.values():
+            view.remove(recipe, key)
+        if self.similar_index is not None:
+            self.similar_index.remove(key)
+        if self.price_cache is not None:
+            self.price_cache.discard(key)
+
+    def get_indexed(self, key):
+        if self.storage is not None:
+            return self.storage.get(key)
+        if self.on_snapshot():
+            return self.snapshot.get(key)
+        stored = self.name_index.get(key)
+        if stored is None or not self.columnar:
+            return stored
+        return self.recipes.row(stored)
+
+    def row_to_recipe(self, row): # raises RowError (a ValueError) for rows that don't fit the schema
+        return Recipe(*ingest.convert_row(row))
+
+    def scan_rows(self, start=0): # yields (row, byte offset where the next row starts)
+        with open(self.filename, mode='rb') as file:
+            file.seek(start)
+            position = start
+            def lines():
+                nonlocal position
+                for raw in file:
+                    position += len(raw)
+                    yield raw.decode('utf-8')
+            for row in csv.reader(lines()):
+                yield row, position
+
+    def parse_recipes(self): # yields recipes from the csv as they are parsed, invalid rows go in ingest_report
+        self.ingest_report = IngestReport(self.filename)
+        return read_recipes(self.filename, Recipe, self.ingest_report)
+
+    def journal_pending(self):
+        return os.path.exists(self.journal_name) and os.path.getsize(self.journal_name) > 0
+
+    def iter_recipes(self): # stream the catalog without loading it, unless memory is already up to date (or a backend has it)
+        if self.on_snapshot():
+            return iter(self.snapshot)
+        if self.loaded or self.storage is not None or self.sharded or self.journal_pending() or not os.path.exists(self.filename):
+            self.ensure_loaded()
+            return iter(self.recipes)
+        return self.parse_recipes()
+
+    def loads_row(self, row, keys): # would load_recipes keep this row, given the name keys kept before it
+        if not row: # blank line
+            return False
+        try:
+            key = name_key(self.row_to_recipe(row).name)
+        except RowError:
+            return False
+        if key in keys:
+            return False
+        keys.add(key)
+        return True
+
+    def ensure_offsets(self, row_number):
+        # scan far enough to know where row_number (counted the way load_recipes numbers recipes) is,
+        # returns False if the catalog has fewer rows
+        stamp = self.read_stamp()[0]
+        if stamp != self.offsets_stamp:
+            self.offsets = array('Q')
+            self.offsets_stamp = stamp
+            self.offsets_done = False
+            self.offsets_position = None
+            self.offsets_count = 0
+            self.offsets_keys = set()
+            self.offsets_skipped = set()
+        if self.offsets_position is None:
+            for row, position in self.scan_rows():
+                self.offsets_position = position # first data row starts right after the header
+                break
+            else:
+                self.offsets_done = True
+                return False
+        if self.offsets_count <= row_number and not self.offsets_done:
+            start = self.offsets_position
+            for row, position in self.scan_rows(start):
+                if self.loads_row(row, self.offsets_keys):
+                    if self.offsets_count % self.OFFSET_STEP == 0:
+                        self.offsets.append(start)
+                    self.offsets_count += 1
+                else:
+                    self.offsets_skipped.add(start)
+                start = position
+                if self.offsets_count > row_number:
+                    break
+            else:
+                self.offsets_done = True
+            self.offsets_position = start
+        return self.offsets_count > row_number
+
+    def read_rows(self, first, page_size): # page_size recipes in catalog order starting at row first
+        if self.on_snapshot():
+            return self.snapshot[first:first + page_size]
+        if self.loaded or self.storage is not None or self.sharded or self.journal_pending() or not os.path.exists(self.filename):
+            self.ensure_loaded()
+            return self.recipes[first:first + page_size]
+        self.ensure_offsets(first + page_size - 1) # classifies every row up to the end of the page
+        if self.offsets_count <= first:
+            return []
+        checkpoint = first // self.OFFSET_STEP
+        skip = first - checkpoint * self.OFFSET_STEP
+        start = self.offsets[checkpoint]
+        recipes = []
+        for row, position in self.scan_rows(start):
+            skipped = start in self.offsets_skipped # not in the catalog load_recipes builds, so not numbered
+            start = position
+            if skipped:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            recipes.append(self.row_to_recipe(row))
+            if len(recipes) == page_size:
+                break
+        return recipes
+
+    def sorted_view(self, sort):
+        self.ensure_loaded()
+        view = self.sorted_views.get(sort)
+        if view is None:
+            view = self.sorted_views[sort] = SortedView(sort, self.recipes, name_key)
+        return view
+
+    def text_index(self): # the SearchIndex, built from the loaded catalog on first use
+        self.ensure_loaded()
+        if self.search_index is None:
+            index = SearchIndex()
+            for recipe in self.recipes:
+                index.add(name_key(recipe.name), recipe.flavor)
+            self.search_index = index
+        return self.search_index
+
+    def similar_recipes(self, recipe, k=5):
+        # the k recipes closest to recipe (a saved name, or any Recipe like a custom drink) by flavor, roast,
+        # pumps, shots and add-ins, closest first. None if there is no recipe by that name
+        self.ensure_loaded()
+        if isinstance(recipe, str):
+            recipe = self.get_indexed(name_key(recipe))
+            if recipe is None:
+                return None
+        index = self.similar_index
+        if index is None:
+            index = SimilarIndex()
+            for stored in self.recipes:
+                index.add(name_key(stored.name), stored)
+            if self.storage is None: # a backend's adds and deletes don't come through here to keep it current
+                self.similar_index = index
+        return [self.get_indexed(key) for distance, key in index.nearest(recipe, k, name_key(recipe.name))]
+
+    def prices(self, pricing=None):
+        # PriceCache over pricing (None: whichever engine the cache already has) with a row per catalog
+        # recipe, priced in one batch now and updated by every store / delete after. a storage backend
+        # keeps no rows (its adds and deletes don't come through here) and a lazy catalog fills them in
+        # as it loads; both still get the custom drink LRU
+        cache = self.price_cache
+        if cache is None or (pricing is not None and cache.pricing is not pricing):
+            cache = PriceCache(pricing)
+            if self.storage is None:
+                self.price_cache = cache
+                if self.loaded:
+                    cache.add_many((name_key(recipe.name), recipe) for recipe in self.recipes)
+        return cache
+
+    def page_recipes(self, sort="catalog", cursor=0, page_size=20):
+        # one page in a SORTS order starting at cursor (a position in that order),
+        # returns (recipes, cursor of the next page or None on the last page)
+        if sort not in SORTS:
+            raise ValueError(f"cannot sort by '{sort}'")
+        if page_size < 1 or cursor < 0:
+            raise ValueError(f"cannot page {page_size} recipes from {cursor}")
+        if self.storage is not None:
+            recipes = self.storage.page(sort, cursor, page_size)
+        elif sort == "catalog":
+            recipes = self.read_rows(cursor, page_size)
+        else:
+            recipes = [self.get_indexed(key) for key in self.sorted_view(sort).keys(cursor, cursor + page_size)]
+        return recipes, (cursor + page_size if len(recipes) == page_size else None)
+
+    def recipe_at(self, sort, number): # recipe shown as number (0-based) in that order, None if past the end
+        recipes = self.page_recipes(sort, number, 1)[0] if number >= 0 else []
+        return recipes[0] if recipes else None
 
     def load_recipes(self):
-        self.recipes = [] 
-        if not os.path.exists(self.filename): 
+        if self.storage is not None: # nothing to load, self.recipes reads through to the backend
+            self.recipes = self.storage
+            self.loaded = True
+            return
+        self.close_snapshot()
+        self.recipes = self.new_store()
+        self.reset_indexes()
+        self.rejected_rows = []
+        if self.lock is not None: # read before the files, so a commit racing this load only makes us merge again
+            self.version = self.lock.version()
+        if self.sharded:
+            self.load_shards()
+        elif not os.path.exists(self.filename): 
             print(f"File '{self.filename}' not found. Creating new file....")
+        else:
+        # open csv file (or create if nonexistent)
+            self.store_loaded(self.parse_recipes()) # add existing recipes from csv to self.recipes list 
+            if not self.ingest_report.ok:
+                self.ingest_report.print_errors(note="kept in the file, not loaded")
+            self.rejected_rows = self.ingest_report.rejected_rows + self.rejected_rows
+        self.loaded = True
+        self.replay_journal()
+        self.file_stamp = self.read_stamp()
+        source = self.file_stamp[0]
+        if self.use_snapshot and source is not None and self.file_stamp[1] is None and read_source_stamp(self.snapshot_name) != source:
+            write_snapshot(self.snapshot_name, self.recipes, source, name_key) # csv is newer, recompile for next start
+
+    def load_shards(self):
+        # first shard (in sorted path order) to use a name keeps it, same rule new_recipe enforces
+        self.conflicts = []
+        paths = find_shards(self.filename)
+        if not paths:
+            print(f"No csv files found for '{self.filename}'.")
             return
-    # open csv file (or create if nonexistent)
-        with open(self.filename, mode='r', newline='', encoding='utf-8') as file: 
-            reader = csv.reader(file)
-            header = next(reader, None) # skip first row
-            for row in reader:
-                try:
-                    recipe = Recipe(
-                        name=row[0], 
-                        flavor=row[1] or None, 
-                        pumps=int(row[2]) if row[2].isdigit() else None, 
-                        roast=row[3] or None, 
-                        shots=int(row[4]) if row[4].isdigit() else None,
-                        creamer=row[5], 
-                        sugar=row[6], 
-                        iced=row[7] or None
-                        )
-                    self.recipes.append(recipe) # add existing recipes from csv to self.recipes list 
-                except IndexError:
+        owners = {} # name key -> index of the shard that supplied it
+        for number, (path, (rows, report)) in enumerate(read_shards(paths, self.workers)):
+            if not report.ok:
+                report.print_errors()
+            for values in rows:
+                recipe = Recipe(*values)
+                key = name_key(recipe.name)
+                if self.store_recipe(recipe):
+                    owners[key] = number
+                else:
+                    self.conflicts.append({"name": recipe.name, "kept": paths[owners[key]], "skipped": path})
+        if self.conflicts:
+            print(f"Merged {len(paths)} files: {len(self.conflicts)} duplicate names skipped")
+
+    def read_stamp(self):
+        stamp = []
+        for name in (self.filename, self.journal_name):
+            try:
+                if self.sharded and name == self.filename: # any shard changing (or appearing) counts
+                    stamp.append(tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in find_shards(name)))
                     continue
+                info = os.stat(name)
+                stamp.append((info.st_mtime_ns, info.st_size))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def refresh(self): # reparse only if another process changed the files since we last touched them
+        if self.storage is not None:
+            self.ensure_loaded()
+        elif self.on_snapshot():
+            if self.snapshot.source_stamp != self.read_stamp()[0] or self.journal_pending():
+                self.load_recipes()
+        elif not self.loaded:
+            self.load_recipes()
+        elif self.read_stamp() != self.file_stamp or (self.lock is not None and self.lock.version() != self.version):
+            self.reload_count += 1
+            self.load_recipes()
+        return self
+
+    def replay_journal(self): # apply mutations logged since the last compaction
+        self.journal_count = 0
+        if not os.path.exists(self.journal_name):
+            return
+        deleted = False
+        with open(self.journal_name, mode='r', newline='', encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+        if rows and self.torn_journal_end() is not None: # a crash mid-append left half a row, it was never committed
+            rows.pop()
+        for row in rows:
+            try:
+                if row[0] == "add":
+                    self.store_recipe(self.row_to_recipe(row[1:])) # no-op if a compaction was interrupted
+                elif row[0] == "del":
+                    removed = self.get_indexed(name_key(row[1]))
+                    if removed is not None:
+                        self.unindex_recipe(removed)
+                        deleted = True
+                else:
+                    continue
+                self.journal_count += 1
+            except (IndexError, RowError): # malformed row
+                continue
+        if deleted:
+            self.prune()
+        if not self.journal or self.journal_count >= self.journal_limit:
+            self.compact()
+
+    def prune(self): # drop unindexed recipes from the store in one pass instead of list.remove per delete
+        if self.columnar:
+            self.recipes.retain(set(self.name_index.values()))
+        else:
+            self.recipes = [r for r in self.recipes if self.name_index.get(name_key(r.name)) is r]
+
+    def wrote(self): # after any write to the csv or log: remember what is on disk now
+        self.file_stamp = self.read_stamp()
+        if self.lock is not None: # one past the newest version, even if our copy was older (e.g. a plain save_recipe)
+            self.version = max(self.lock.version() or 0, self.version) + 1
+            self.lock.set_version(self.version)
+
+    def torn_journal_end(self): # where the log's last complete line ends if a partial line follows it, else None
+        try:
+            with open(self.journal_name, mode='rb') as file:
+                end = file.seek(0, os.SEEK_END)
+                if end == 0:
+                    return None
+                file.seek(end - 1)
+                if file.read(1) in (b"\r", b"\n"): # the usual case: one byte read, however long the log is
+                    return None
+                while end > 0: # torn: walk back a block at a time to the line break before it
+                    start = max(end - 4096, 0)
+                    file.seek(start)
+                    block = file.read(end - start)
+                    cut = max(block.rfind(b"\r"), block.rfind(b"\n"))
+                    if cut >= 0:
+                        return start + cut + 1
+                    end = start
+                return 0
+        except FileNotFoundError:
+            return None
+
+    def append_journal(self, rows): # one write and fsync for however many rows (call with the lock held)
+        end = self.torn_journal_end()
+        if end is not None: # cut the torn line off, or the first new row would be glued onto it
+            os.truncate(self.journal_name, end)
+        with open(self.journal_name, mode='a', newline='', encoding='utf-8') as file:
+            csv.writer(file).writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        self.journal_count += len(rows)
+        self.wrote()
+        if self.journal_count >= self.journal_limit:
+            self.compact()
+
+    def compact(self): # fold the log back into the csv
+        with self.lock:
+            if self.lock.version() != self.version: # someone committed after we read the log, it's theirs to fold now
+                return
+            self.save_recipe()
+            if os.path.exists(self.journal_name):
+                os.remove(self.journal_name)
+            self.journal_count = 0
+            self.file_stamp = self.read_stamp()
 
-    def save_recipe(self):
-        with open(self.filename, mode='w', newline='', encoding='utf-8') as file:
+    def commit(self, adds=(), deletes=()):
+        # write recipes already added to / removed from memory. under the lock, if the catalog version moved
+        # since we read it, reload what the other processes wrote and redo our changes on top of it;
+        # returns the names of adds that lost to a recipe another process added first
+        if self.storage is not None: # already committed by the backend
+            return []
+        if self.lock is None: # sharded, save_recipe explains why nothing is written
+            self.save_recipe()
+            return []
+        with self.lock:
+            lost = []
+            if self.lock.version() != self.version:
+                self.merge_count += 1
+                self.load_recipes()
+                deleted = False
+                for recipe in deletes:
+                    removed = self.get_indexed(name_key(recipe.name))
+                    if removed is not None:
+                        self.unindex_recipe(removed)
+                        deleted = True
+                if deleted:
+                    self.prune()
+                for recipe in adds:
+                    if not self.store_recipe(recipe):
+                        lost.append(recipe.name)
+            if self.journal:
+                lost_keys = set(name_key(name) for name in lost)
+                rows = [["del", recipe.name] for recipe in deletes]
+                rows += [["add"] + recipe.list_recipe() for recipe in adds if name_key(recipe.name) not in lost_keys]
+                if rows:
+                    self.append_journal(rows)
+            else:
+                self.save_recipe()
+        return lost
+
+    def commit_add(self, recipe): # returns False if another process added the name first
+        return not self.commit(adds=[recipe])
+
+    def commit_delete(self, recipe):
+        self.commit(deletes=[recipe])
+
+    def save_recipe(self, filename=None): # filename writes the catalog somewhere else (e.g. merging shards)
+        if self.storage is not None and filename is None: # every change is committed as it happens
+            return
+        if self.sharded and filename is None:
+            print(f"Note: '{self.filename}' is several files, changes are not saved (merge them into one csv first)")
+            return
+        target = filename or self.filename
+        # write a temp file and rename it over the csv so a crash never leaves a truncated catalog
+        temp_name = target + ".tmp"
+        with open(temp_name, mode='w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 writer.writerow(self.FIELDNAMES) # Write the header
                 for recipe in self.recipes: # for each recipe in list
                     writer.writerow(recipe.list_recipe())  # write to recipe csv
+                if filename is None: # rows the schema rejected stay in the catalog as they were, until fixed by hand
+                    writer.writerows(self.rejected_rows)
+                file.flush()
+                os.fsync(file.fileno())
+        if filename is not None:
+            os.replace(temp_name, target)
+            return
+        with self.lock:
+            os.replace(temp_name, target)
+            if not self.journal and os.path.exists(self.journal_name): # the csv now holds everything
+                os.remove(self.journal_name)
+            self.wrote()
 
     def new_recipe(self, recipe: Recipe):
-        for existing in self.recipes:
-            if existing.name.lower() == recipe.name.lower():
-                print(f"ERROR: cannot add '{recipe.name}' (Duplicate name)")
-                return
-        self.recipes.append(recipe) # add recipe to self.recipes list from load_recipe
-        self.save_recipe() # write to csv file
+        self.ensure_loaded()
+        try:
+            stored = self.store_recipe(recipe) # add recipe to self.recipes list from load_recipe
+        except ValueError as e:
+            print(f"ERROR: cannot add '{recipe.name}' ({e})")
+            return
+        if not stored:
+            print(f"ERROR: cannot add '{recipe.name}' (Duplicate name)")
+            return
+        if not self.commit_add(recipe): # write to csv file (or journal)
+            print(f"ERROR: cannot add '{recipe.name}' (Duplicate name, just added by another register)")
+            return
         print(f"Added '{green}{recipe.name}{default}'")
 
 
-    def view_recipes(self, search_term=None): # view all and/or search 
-        if not self.recipes: # if recipes empty
-            print(f"No recipes loaded...")
-            return
+    def view_recipes(self, search_term=None, limit=None, page=None, page_size=20, out=None, style=None, sort="catalog"): # view all and/or search 
+        # limit stops after that many matches, page shows one page_size slice of the catalog in sort order.
+        # output goes through a Renderer: ansi / plain (picked from out) or json lines
+        view = Renderer(out, style)
+        try:
+            self.render_recipes(view, search_term, limit, page, page_size, sort)
+        finally:
+            view.flush()
+
+    def recipe_line(self, c, i, recipe):
+        return f"{i}. {c.green}{recipe.name}{c.default}: Flavor: {recipe.flavor or 'N/A'}, Pumps: {recipe.pumps or 'N/A'}, Roast: {recipe.roast or 'N/A'}, Shots: {recipe.shots or 0}, Creamer: {'no' if recipe.creamer is False else 'yes'}, Sugar: {'no' if recipe.sugar is False else 'yes'}, Iced: {'no' if recipe.iced is False else 'yes'}"
+
+    def render_recipes(self, view, search_term, limit, page, page_size, sort):
+        c = view.c
+        indexed = False
+        if page is not None:
+            source = self.page_recipes(sort, page * page_size, page_size)[0]
+            i = page * page_size + 1
+        elif search_term: # through the trigram index, loading the catalog (e.g. off a snapshot) to build it
+            self.ensure_loaded()
+            if not self.recipes: # if recipes empty
+                view.note(f"No recipes loaded...")
+                return
+            if self.storage is not None:
+                source = self.storage.search(search_term, limit)
+            else:
+                source = (self.get_indexed(key) for key in self.text_index().substring(search_term))
+            indexed = True
+            i = 1
+        else:
+            source = self.iter_recipes()
+            i = 1
+        seen = False
+        shown = 0
         found = False # -------------------------------------------------------------- NOTE: do I need this? 
-        i = 1
-        for recipe in self.recipes:
-            display = f"{i}. {green}{recipe.name}{default}:"
-            if search_term and search_term.lower() not in recipe.name.lower():
+        as_json = view.style == "json"
+        for recipe in source:
+            seen = True
+            if search_term and not indexed and search_term.lower() not in recipe.name.lower():
                 continue  
-            display += f" Flavor: {recipe.flavor or 'N/A'}, Pumps: {recipe.pumps or 'N/A'}, Roast: {recipe.roast or 'N/A'}, Shots: {recipe.shots or 0}, Creamer: {'no' if recipe.creamer is False else 'yes'}, Sugar: {'no' if recipe.sugar is False else 'yes'}, Iced: {'no' if recipe.iced is False else 'yes'}"
-            print(display)
+            if limit is not None and shown >= limit: # checked before showing, so a limit of 0 shows nothing
+                break
+            if as_json:
+                view.record(recipe.to_dict())
+            else:
+                view.line(self.recipe_line(c, i, recipe))
             found = True
             i += 1
+            shown += 1
+        if not seen and not indexed: # if recipes empty
+            if page and self.page_recipes(sort, 0, 1)[0]: # there are recipes, just not this many pages of them
+                view.note(f"Page {page + 1} is past the end of the catalog.")
+            else:
+                view.note(f"No recipes loaded...")
+            return
         if search_term and not found: 
-            print(f"No recipes found matching '{search_term}'.")
+            view.note(f"No recipes found matching '{search_term}'.")
+            suggestions = self.search_recipes(search_term, 3)
+            if suggestions:
+                view.note(f"Did you mean: {', '.join(f'{c.green}{r.name}{c.default}' for r in suggestions)}?")
+
+    def search_recipes(self, query, k=10): # best k recipes for query, tolerant of typos
+        self.ensure_loaded()
+        if self.storage is not None: # backends only do plain substring matches
+            return self.storage.search(query, k)
+        return [self.get_indexed(key) for score, key in self.text_index().search(query, k)]
 
     def exact_match(self, search_term=None): # using only for making a coffee
+        self.ensure_readable()
         if not self.recipes:
             print(f"No recipes loaded...")
             return
-        i = 1
-        for recipe in self.recipes:
-            if search_term and search_term.lower() != recipe.name.lower():
-                continue  
-            i += 1
-            return [
-                recipe.name,
-                recipe.flavor if recipe.flavor is not None else '',
-                recipe.pumps if recipe.pumps is not None else '',
-                recipe.roast if recipe.roast is not None else '',
-                recipe.shots if recipe.shots is not None else '',
-                recipe.creamer,
-                recipe.sugar,
-                recipe.iced
-            ]
-            
+        if not search_term:
+            return self.recipes[0].list_recipe()
+        recipe = self.get_indexed(name_key(search_term))
+        if recipe is None:
+            return
+        return recipe.list_recipe()
+
+    def has_name(self, name):
+        self.ensure_readable()
+        if self.storage is not None:
+            return self.storage.contains(name_key(name))
+        if self.on_snapshot():
+            return self.snapshot.contains(name_key(name))
+        return name_key(name) in self.name_index
+
+    def find_recipe(self, name):
+        self.ensure_readable()
+        return self.get_indexed(name_key(name))
+
+    def index_of(self, name): # catalog position of a recipe (what del_recipe takes), None if missing
+        self.ensure_readable()
+        key = name_key(name)
+        if self.storage is not None:
+            return self.storage.index_of(key)
+        if self.on_snapshot():
+            return self.snapshot.index_of(key)
+        if key not in self.name_index:
+            return None
+        for i, recipe in enumerate(self.recipes):
+            if name_key(recipe.name) == key:
+                return i
+
+    def filter_recipes(self, flavor=None, roast=None, creamer=None, sugar=None, iced=None):
+        self.ensure_loaded()
+        if self.storage is not None:
+            return self.storage.filter(flavor, roast, creamer, sugar, iced)
+        # intersect the matching buckets, walking the smallest one so order follows the catalog
+        buckets = []
+        if flavor is not None:
+            buckets.append(self.flavor_index.get(flavor, {}))
+        if roast is not None:
+            buckets.append(self.roast_index.get(roast, {}))
+        wanted = {}
+        for flag, value in (("creamer", creamer), ("sugar", sugar), ("iced", iced)):
+            if value is True:
+                buckets.append(self.flag_index[flag])
+            elif value is False:
+                wanted[flag] = False
+        if not buckets:
+            candidates = self.recipes
+        else:
+            buckets.sort(key=len)
+            candidates = [self.get_indexed(k) for k in buckets[0] if all(k in b for b in buckets[1:])]
+        if wanted:
+            candidates = [r for r in candidates if all(getattr(r, f) is v for f, v in wanted.items())]
+        return list(candidates)
+
     def list_names(self): # list of all recipe names (for reference when adding)
+        self.ensure_readable()
         name_lst = []
         for recipe in self.recipes:
             name_lst.append(recipe.name)
         return name_lst
     
     def del_recipe(self, index: int): 
+        self.ensure_loaded()
         # self.view_recipes()
         try:
             removed_recipe = self.recipes.pop(index)
-            self.save_recipe()
+            self.unindex_recipe(removed_recipe)
+            self.commit_delete(removed_recipe)
             print(f"Removed '{green}{removed_recipe.name}{default}'")
         except IndexError:
             print(f"Error: {index + 1} does not exist.")
 
+    def csv_recipes(self, filename, report=None): # recipes from any csv with the same columns as recipes.csv
+        return read_recipes(filename, Recipe, report)
+
+    def add_many(self, recipes): # add a batch with one save (or one journal write / transaction)
+        self.ensure_loaded()
+        if self.storage is not None:
+            return self.storage.add_many(recipes)
+        result = {"added": [], "skipped": []} # skipped = duplicate names, of the catalog or within the batch, or recipes the store can't hold
+        added = []
+        for recipe in recipes:
+            try:
+                stored = self.store_recipe(recipe)
+            except ValueError:
+                stored = False
+            if stored:
+                added.append(recipe)
+                result["added"].append(recipe.name)
+            else:
+                result["skipped"].append(recipe.name)
+        if added:
+            lost = self.commit(adds=added)
+            if lost:
+                lost_keys = set(name_key(name) for name in lost)
+                result["added"] = [name for name in result["added"] if name_key(name) not in lost_keys]
+                result["skipped"] += lost
+        return result
+
+    def delete_many(self, targets): # names and/or catalog positions (as they are before deleting), one save
+        self.ensure_loaded()
+        result = {"deleted": [], "missing": []}
+        doomed = {} # name key -> recipe
+        for target in targets:
+            if isinstance(target, int):
+                try:
+                    recipe = self.recipes[target]
+                except IndexError:
+                    result["missing"].append(target)
+                    continue
+            else:
+                recipe = self.get_indexed(name_key(target))
+                if recipe is None:
+                    result["missing"].append(target)
+                    continue
+            doomed[name_key(recipe.name)] = recipe
+        if not doomed:
+            return result
+        if self.storage is not None:
+            self.storage.delete_many(doomed)
+        else:
+            for recipe in doomed.values():
+                self.unindex_recipe(recipe)
+            self.prune()
+            self.commit(deletes=list(doomed.values()))
+        result["deleted"] = [recipe.name for recipe in doomed.values()]
+        return result
+
     def list_flavors(self): # count pumps per flavor --- NOTE: maybe for tracking?? we'll see.... maybe will do recipe count instead of pump? idk
-        flavor_lst = []
-        for recipe in self.recipes:
-            flavor = recipe.flavor
-            if recipe.flavor and flavor not in flavor_lst:
-                flavor_lst.append(flavor)
-        return flavor_lst       
+        self.ensure_readable()
+        if self.storage is not None:
+            return self.storage.flavors()
+        if self.on_snapshot():
+            return self.snapshot.flavors()
+        return list(self.flavor_index)
 
 class User_Interaction:
-    def __init__(self):
+    def __init__(self, recipe_manager=None, pricing=None, order_log=None, inventory=None):
+        self.recipe_manager = recipe_manager # shared by every menu action, created on first use
+        self.pricing = pricing or PricingEngine()
+        self.order_log = order_log # OrderLog that completed receipts are written to, None to keep nothing
+        self.page_size = 20 # recipes per page when browsing
+        self.inventory = inventory # Inventory the drinks are taken out of, None to not track stock
         self.main_options = [
             'View recipes',
             'Search for recipes',
             'Add new recipe',
             'Delete a recipe',
             'Make a coffee',
+            'Similar drinks',
             'Exit'            
         ]
         self.add_details = [
@@ -167,6 +915,12 @@ class User_Interaction:
             'Iced (y/N)'
         ]
      
+    def load_manager(self):
+        if self.recipe_manager is None:
+            self.recipe_manager = Recipe_Manager("recipes.csv")
+            return self.recipe_manager
+        return self.recipe_manager.refresh()
+
     def main_menu(self): 
         menu_txt = "Main Menu"
         print(f"{borange}{menu_txt:^24}{default}\n------------------------")
@@ -179,23 +933,18 @@ class User_Interaction:
             i += 1
 
     def enter_new_name(self):    # ensure name is unique & not blank
-        recipe = Recipe_Manager("recipes.csv") 
-        name_Lst = recipe.list_names()
-        name_lst = []
-        for n in name_Lst:
-            name_lst.append(n.lower())
+        recipe = self.load_manager()
         while True:
             entry = input(f"Please enter {teal}Name{default}: ")
             if not entry:
                 print(f"ERROR: must provide a name")
                 continue
-            if entry.lower() in name_lst:
+            if recipe.has_name(entry):
                 print(f"ERROR: cannot add '{entry}' (Duplicate name)")
                 continue
             return entry 
         
     def new_details(self, name):    # finish recipe details for adding
-        recipe = Recipe_Manager("recipes.csv") 
     # receive user input
         while True:
             entry_lst = [name]            
@@ -219,14 +968,15 @@ class User_Interaction:
                 new = Recipe(
                     name=entry_lst[0], 
                     flavor=entry_lst[1] or None, 
-                    pumps=int(entry_lst[2]) if entry_lst[2].isdigit() else None, 
+                    pumps=to_count("pumps", entry_lst[2]) if entry_lst[2].isdigit() else None, 
                     roast=entry_lst[3] or None, 
-                    shots=int(entry_lst[4]) if entry_lst[4].isdigit() else None,
+                    shots=to_count("shots", entry_lst[4]) if entry_lst[4].isdigit() else None,
                     creamer=entry_lst[5], 
                     sugar=entry_lst[6], 
                     iced=entry_lst[7]
                     )
             except ValueError as e:
+                print(f"ERROR: {e}")
                 continue
             return new
         
@@ -235,20 +985,21 @@ class User_Interaction:
                 custom = Recipe(
                     name=entry_lst[0], 
                     flavor=entry_lst[1] or None, 
-                    pumps=int(entry_lst[2]) if entry_lst[2].isdigit() else None, 
+                    pumps=to_count("pumps", entry_lst[2]) if entry_lst[2].isdigit() else None, 
                     roast=entry_lst[3] or None, 
-                    shots=int(entry_lst[4]) if entry_lst[4].isdigit() else None,
+                    shots=to_count("shots", entry_lst[4]) if entry_lst[4].isdigit() else None,
                     creamer=entry_lst[5], 
                     sugar=entry_lst[6], 
                     iced=entry_lst[7]
                     )
                     
         except ValueError as e:
-            print("invalid recipe")
+            print(f"invalid recipe: {e}")
+            return None
         return custom
         
     def select_recipe(self, matches):
-        recipe = Recipe_Manager("recipes.csv")
+        recipe = self.load_manager()
         while True:
             try:
                 choice_recipe = input(f"Please enter the number of the recipe you would like to make: ")
@@ -266,86 +1017,76 @@ class User_Interaction:
                 print("Please make a valid selection.")
                 continue
 
-    def prepare_receipt(self,x,receipt_txt,chosen_recipe,size):
-        # assign fields as floats for receipt
-        if chosen_recipe[2] == '':
-            pump = 0.0
-        else:
-            pump = float(chosen_recipe[2])
-        if chosen_recipe[4] == '':
-            shot = 0.0
-        else:
-            shot = float(chosen_recipe[4])
-        creamer = 0.0
-        sugar = 0.0
-        if chosen_recipe[5] == True:
-            creamer = 1.0
-            creamer = creamer * size
-            if "latte" in chosen_recipe[0].lower():
-                creamer = creamer * 3 # lattes are basically just coffee milk :p
-        if chosen_recipe[6] == True:
-            sugar = 1.0
-            sugar = sugar * size
-        # price per
-        size_price = 1.0
-        pump_price = .25
-        shot_price = .5
-        creamer_price = .1
-        sugar_price = .05
-        # cost
-        size_total = size * size_price
-        pump_total = pump * pump_price
-        shot_total = shot * shot_price
-        creamer_total = creamer * creamer_price
-        sugar_total = sugar * sugar_price
-        # total
-        subtotal = size_total + pump_total + shot_total + creamer_total + sugar_total
-
-        if size == 1:
-            size_str = "Sm"
-        elif size == 2:
-            size_str = "Med"
-        elif size == 3:
-            size_str = "Lg"
-        elif size == 0:
-            size_str = ""
-        if chosen_recipe[0] == "Canceled":
-            receipt_item = f"{red} {x}. {'-' * 34} {chosen_recipe[0]}{default}"
-            receipt_txt = receipt_txt + f"{receipt_item:<58}\n"
-        else:
-            receipt_item = f" {x}. {green}{chosen_recipe[0]}{default} ({size_str})"
-            receipt_txt = receipt_txt + f"{receipt_item:<58}{size_total:.2f}\n      {chosen_recipe[1]:<10}\t  Qty: {pump:.0f}    {pump_total:.2f}\n      {"espresso shots":<10}\t  Qty: {shot:.0f}    {shot_total:.2f}\n      {"cream":<10}\t  Qty: {creamer:.0f}    {creamer_total:.2f}\n      {"sugar":<10}\t  Qty: {sugar:.0f}    {sugar_total:.2f}\n\t\t\t\t\t  {orange}{subtotal:>5.2f}{default}\n"
-        return [
-            receipt_txt,
-            subtotal
-        ]
-        
-        
-    def print_receipt(self, txt, subtotal:float):
-        title = f"Receipt"
-        subtotal_txt = f"Subtotal:"
-        tip = subtotal * .2
-        tip_txt = f"20% Gratuity:"
-        total = subtotal + tip
-        total_txt = f"Total:"
-        # print receipt main
-        print(f"{borange}{title:^49}{default}")
-        print("-" * 49)
-        print(txt)
-        # print total lines:
-        print(f"{orange}{subtotal_txt:>33}{default}   {subtotal:.2f}")
-        print(f"{orange}{tip_txt:>33}{default}   {tip:.2f}")
-        print(f"{orange}{total_txt:>33}{default}{bold}{total:>14.2f}{default}")
-        # print(txt)
-        
+    def browse(self, pick=None, names=False):
+        # page through the catalog: n / p move, s changes the order, Enter goes back.
+        # with pick (what the number is for) a number returns that recipe; numbers count from the
+        # top of the current order, so they map straight to a position in the sorted index
+        recipe = self.load_manager()
+        sort = "catalog"
+        cursor = 0
+        while True:
+            page, next_cursor = recipe.page_recipes(sort, cursor, self.page_size)
+            if not page and cursor == 0:
+                print(f"No recipes loaded...")
+                return None
+            view = Renderer()
+            for i, r in enumerate(page, cursor + 1):
+                view.line(f"{i}. {view.c.green}{r.name}{view.c.default}" if names else recipe.recipe_line(view.c, i, r))
+            view.flush()
+            page_txt = f"Page {cursor // self.page_size + 1}, {sort} order"
+            choice = input(f"{page_txt} - (n)ext, (p)revious, (s)ort{', or the number ' + pick if pick else ''} (Enter to go back): ").strip().lower()
+            if choice in ("n", "next"):
+                if next_cursor is None:
+                    print("That was the last page.")
+                else:
+                    cursor = next_cursor
+            elif choice in ("p", "previous"):
+                cursor = max(cursor - self.page_size, 0)
+            elif choice in ("s", "sort"):
+                options = ", ".join(f"{i}. {s}" for i, s in enumerate(SORTS, 1))
+                entry = input(f"Sort by ({options}): ").strip().lower()
+                if entry.isdigit() and 0 < int(entry) <= len(SORTS):
+                    sort = SORTS[int(entry) - 1]
+                elif entry in SORTS:
+                    sort = entry
+                cursor = 0
+            elif choice.isdigit() and pick:
+                chosen = recipe.recipe_at(sort, int(choice) - 1) # index for consistency :)
+                if chosen is not None:
+                    return chosen
+                print("Please make a valid selection.")
+            elif not choice:
+                return None
+
+    def new_receipt(self): # priced from the manager's price cache, so a saved drink is a table lookup
+        prices = self.recipe_manager.prices(self.pricing) if self.recipe_manager is not None else self.pricing
+        return Receipt(prices, pick_style(sys.stdout))
+
+    def prepare_receipt(self, x, receipt, chosen_recipe, size): # add one drink to the receipt, returns its subtotal
+        return receipt.add(x, chosen_recipe, size)
+
+    def print_receipt(self, receipt):
+        receipt.write() # built up line by line, written once
+
+    def complete_order(self, receipt): # print the receipt, then log the drinks on it
+        self.print_receipt(receipt)
+        if self.order_log is None and self.inventory is None:
+            return
+        rows = order_rows(receipt.orders, self.pricing)
+        if self.order_log is not None:
+            self.order_log.append(rows)
+        if self.inventory is not None and rows:
+            self.inventory.deplete(rows)
+            self.inventory.save()
+
     def main_nav(self, selection):      # handle user's input choice
-        recipe = Recipe_Manager("recipes.csv")
+        recipe = self.load_manager()
         while True: 
         # option 1 - view recipes 
             if selection == 0: 
                 menu_txt = "Recipes"
                 print(f"{borange}{menu_txt:^125}{default}\n{'-' * 125}")
-                recipe.view_recipes()
+                self.browse()
                 return
         # option 2 - search 
             elif selection == 1: 
@@ -372,33 +1113,28 @@ class User_Interaction:
         # option 4 - delete recipe
             elif selection == 3: 
                 while True: 
-                    recipe.view_recipes()
-                    try: 
-                        choice = input(f"Please enter the recipe number you would like to delete: ")
-                        choice == int(choice)
-                        choice = (int(choice) - 1) # index for consistency :)
-                        chosen = recipe.recipes[choice].name
-                        confirm = input(f"Are you sure you want to delete '{green}{chosen}{default}'? (y/{bteal}N{default}): ") 
-                        if confirm.lower() == "yes" or confirm.lower() == "y":
-                            recipe.del_recipe(choice)
-                        else: 
-                            print(f"Did not delete {chosen}")
-                            continue       
-                        again = input(f"Would you like to delete another? (y/{bteal}N{default}): ")
-                        if again.lower() == "yes" or again.lower() == "y":
-                            continue
-                        else: 
-                            return
-                    except ValueError:
-                        print(f"{choice} is not a valid option.")
+                    picked = self.browse("of the recipe you would like to delete")
+                    if picked is None:
+                        return
+                    chosen = picked.name
+                    confirm = input(f"Are you sure you want to delete '{green}{chosen}{default}'? (y/{bteal}N{default}): ") 
+                    if confirm.lower() == "yes" or confirm.lower() == "y":
+                        recipe.del_recipe(recipe.index_of(chosen))
+                    else: 
+                        print(f"Did not delete {chosen}")
+                        continue       
+                    again = input(f"Would you like to delete another? (y/{bteal}N{default}): ")
+                    if again.lower() == "yes" or again.lower() == "y":
+                        continue
+                    else: 
+                        return
         # option 5 - make coffee
             elif selection == 4:
-                recipe = Recipe_Manager()
                 flavors = recipe.list_flavors()
                 x = 1 # for adding to receipt
-                receipt_txt = "" # initializing receipt entries
-                grand_total = 0 # for adding to the receipt
+                receipt = self.new_receipt() # line items and running total
                 while True:
+                    order_start = instrument.clock() # one drink, flavor menu to receipt line
                     print(f"------- {orange}Coffee flavors{default} -------")
                     print(f"  1. {teal}Any{default}")
                     print(f"  2. {teal}Custom{default}")
@@ -415,14 +1151,10 @@ class User_Interaction:
                         if choice_flavor == 1: # if any option is chosen
                             menu_txt = f"All recipes"
                             print(f"{menu_txt:^31}\n------------------------------") 
-                            i = 1
-                            matches = []
-                            for rec in recipe.recipes:
-                                matches.append(rec.name)
-                            for n in matches:
-                                print(f"{i}. {green}{n}{default}")
-                                i += 1             
-                            chosen_recipe = self.select_recipe(matches)    
+                            picked = self.browse("of the recipe you would like to make", names=True)
+                            if picked is None: # went back to the flavors
+                                continue
+                            chosen_recipe = recipe.exact_match(picked.name)
                         elif choice_flavor == 2: # if custom option is chosen                       
                             chosen_recipe = ["Custom coffee"]            
                             for c in self.custom_details:
@@ -483,7 +1215,8 @@ class User_Interaction:
                                 else:
                                     save_lst[6] = False 
                                 custom_new = self.new_custom(save_lst)
-                                recipe.new_recipe(custom_new)                          
+                                if custom_new is not None:
+                                    recipe.new_recipe(custom_new)
                             else:
                                 print("Recipe not saved")
                             
@@ -493,23 +1226,15 @@ class User_Interaction:
                             chosen_flavor = flavors[choice_flavor]
                             menu_txt = f"Recipes using {chosen_flavor}"
                             print(f"{menu_txt:^31}\n------------------------------")
-                            search_lst = []
-                            for r in recipe.recipes: 
-                                name = r.name
-                                # name = name.lower()
-                                if r.flavor == chosen_flavor: # if flavor matches flavor in list of recipes
-                                    search_lst.append(name) # add name to search list
+                            matches = [r.name for r in recipe.filter_recipes(flavor=chosen_flavor)]
                             i = 1
-                            matches = []
-                            for s in search_lst: # for each name with that flavor
+                            for s in matches: # for each name with that flavor
                                 print(f"{i}. {green}{s}{default}") # print name 
-                                search_result = recipe.exact_match(s)     
-                                matches.append(search_result[0]) # add search result(s) to list
                                 i += 1  
                             
                             chosen_recipe = self.select_recipe(matches) # select recipe from match list
                         else: # if exit or no option is chosen
-                            self.print_receipt(receipt_txt, grand_total)
+                            self.complete_order(receipt)
                             return
                             
 
@@ -536,14 +1261,12 @@ class User_Interaction:
                             size = 1
                         size == int(size) # ensure size is an integer
                         size = float(size) # change to float for math
-                        prepared_receipt = self.prepare_receipt(x, receipt_txt, chosen_recipe, size)
-                        receipt_txt = prepared_receipt[0]
-                        subtotal = prepared_receipt[1]
-                        grand_total += subtotal
+                        self.prepare_receipt(x, receipt, chosen_recipe, size)
+                        instrument.record("main_nav.order", order_start)
                         x += 1
                         again = input(f"Would you like to make another? ({bteal}Y{default}/n): ")
                         if again.lower() == "n" or again.lower() == "no":
-                            self.print_receipt(receipt_txt, grand_total)            
+                            self.complete_order(receipt)
                             return 
                         else:           
                             continue
@@ -554,20 +1277,229 @@ class User_Interaction:
                         print("index error")
                     # except NameError:
                     #     print("name error")
+        # option 6 - similar drinks
+            elif selection == 5:
+                while True:
+                    picked = self.browse("of the drink to find similar ones for", names=True)
+                    if picked is None:
+                        return
+                    menu_txt = f"Similar to {picked.name}"
+                    print(f"{borange}{menu_txt:^125}{default}\n{'-' * 125}")
+                    view = Renderer()
+                    for i, match in enumerate(recipe.similar_recipes(picked.name), 1):
+                        view.line(recipe.recipe_line(view.c, i, match))
+                    view.flush()
+                    again = input(f"Would you like to look up another? (y/{bteal}N{default}): ")
+                    if again.lower() == "yes" or again.lower() == "y":
+                        continue
+                    else: 
+                        return
             else: # exit -- shouldn't need this but whatever
                 continue
 
+def positive_int(value): # argparse type for counts like --page-size
+    number = int(value)
+    if number < 1:
+        raise ValueError(value)
+    return number
+
+def file_bytes(filename):
+    return os.path.getsize(filename) if filename and os.path.exists(filename) else 0
+
+def catalog_bytes(manager): # csv plus journal, what a load reads and a save leaves behind
+    if manager.storage is not None or manager.sharded:
+        return 0
+    return file_bytes(manager.filename) + file_bytes(manager.journal_name)
+
+# what instrument.enable wraps with timers: (class, method, bytes moved by a call or None)
+HOT_PATHS = [
+    (Recipe_Manager, "load_recipes", lambda args, result: catalog_bytes(args[0])),
+    (Recipe_Manager, "save_recipe", lambda args, result: file_bytes(args[1]) if len(args) > 1 and args[1] else catalog_bytes(args[0])),
+    (Recipe_Manager, "append_journal", None),
+    (Recipe_Manager, "commit", None),
+    (Recipe_Manager, "exact_match", None),
+    (Recipe_Manager, "view_recipes", None),
+    (Recipe_Manager, "search_recipes", None),
+    (User_Interaction, "prepare_receipt", None),
+    (User_Interaction, "print_receipt", None)
+]
+
+def run_cli(args): # non-interactive commands, e.g. recipe_manager.py orders --from orders.jsonl
+    parser = argparse.ArgumentParser(prog="recipe_manager.py", description="Coffee Manager")
+    parser.add_argument("--file", default="recipes.csv", help="recipe catalog (default: recipes.csv)")
+    parser.add_argument("--format", choices=["ansi", "plain", "json"], default=None, help="output style (default: ansi on a terminal, plain when piped)")
+    parser.add_argument("--instrument", metavar="REPORT", default=None, help="time the hot paths and report on exit: table, json (both to stderr) or a .json file")
+    parser.add_argument("--profile", metavar="FILE", default=None, help="also capture a cProfile of the run into FILE (see python -m pstats)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    lookup = commands.add_parser("lookup", help="print one recipe by name")
+    lookup.add_argument("name")
+    price = commands.add_parser("price", help="price one drink, e.g. price 'Deez Nutz' l")
+    price.add_argument("name")
+    price.add_argument("size", nargs="?", default="1", help="1/s/small (default), 2/m/medium or 3/l/large")
+    commands.add_parser("list-flavors", help="print every flavor")
+    validate = commands.add_parser("validate", help="check every row of the catalog (or another csv) against the schema")
+    validate.add_argument("source", nargs="?", default=None, help="csv to check (default: --file)")
+    validate.add_argument("--show", type=int, default=100, help="most problems to list (default: 100)")
+    similar = commands.add_parser("similar", help="recipes most like one recipe, e.g. similar 'Deez Nutz' -k 10")
+    similar.add_argument("name")
+    similar.add_argument("-k", type=int, default=5, help="how many to list (default: 5)")
+    orders = commands.add_parser("orders", help="price a stream of JSONL orders, one receipt per line")
+    orders.add_argument("--from", dest="source", default="-", help="orders file (default: stdin)")
+    orders.add_argument("--log", default="orders.log", help="order log to append priced orders to (default: orders.log)")
+    orders.add_argument("--inventory", default="inventory.json", help="stock file the orders are taken out of (default: inventory.json)")
+    orders.add_argument("--no-log", action="store_true", help="price only, keep no order history or stock changes")
+    report = commands.add_parser("report", help="sales report streamed from the order log")
+    report.add_argument("--log", default="orders.log", help="order log to read (default: orders.log)")
+    report.add_argument("--window", choices=["hour", "day", "week"], default="day", help="revenue window (default: day)")
+    report.add_argument("--since", help="first time to include, unix seconds or YYYY-MM-DD[THH:MM] UTC")
+    report.add_argument("--until", help="time to stop before, same formats as --since")
+    report.add_argument("--top", type=int, default=10, help="how many popular recipes to list")
+    report.add_argument("--json", action="store_true", help="print the report as one JSON object")
+    stock = commands.add_parser("inventory", help="set or restock ingredients and forecast when they run out")
+    stock.add_argument("--inventory", default="inventory.json", help="stock file (default: inventory.json)")
+    stock.add_argument("--set", action="append", default=[], metavar="KEY=N", help="set a level, e.g. --set syrup:Caramel=400")
+    stock.add_argument("--restock", action="append", default=[], metavar="KEY=N", help="add to a level, e.g. --restock roast:Dark=200")
+    stock.add_argument("--replay", metavar="LOG", help="take every order in an order log out of stock (e.g. to start tracking mid-day)")
+    stock.add_argument("--json", action="store_true", help="print the forecast as JSON")
+    view = commands.add_parser("view", help="print the catalog, or the recipes matching --search")
+    view.add_argument("--search", default=None, help="only names containing this")
+    view.add_argument("--limit", type=positive_int, default=None, help="stop after this many recipes")
+    view.add_argument("--sort", choices=SORTS, default=None, help="print one --page in this order")
+    view.add_argument("--page", type=int, default=None, help="page number to print, from 1 (default: everything)")
+    view.add_argument("--page-size", type=positive_int, default=20)
+    import_csv = commands.add_parser("import-csv", help="add every recipe from a csv to the catalog in one save")
+    import_csv.add_argument("source")
+    export_csv = commands.add_parser("export-csv", help="write the catalog out as csv")
+    export_csv.add_argument("target")
+    merge = commands.add_parser("merge", help="load a folder or glob of csvs in parallel and write them as one csv")
+    merge.add_argument("source", help="folder of csvs or a quoted glob like 'stores/*.csv'")
+    merge.add_argument("--into", required=True, help="csv to write the merged catalog to")
+    merge.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parsed = parser.parse_args(args)
+    if parsed.instrument or parsed.profile:
+        instrument.enable(HOT_PATHS, parsed.instrument or "table", parsed.profile)
+    if parsed.command in ("lookup", "price", "list-flavors"):
+        # headless one-shot queries: nothing is parsed up front, and with an up to date
+        # snapshot nothing is parsed at all, so startup doesn't grow with the catalog
+        recipe = Recipe_Manager(parsed.file, lazy=True, snapshot=True)
+        view = Renderer(style=parsed.format)
+        if parsed.command == "list-flavors":
+            for flavor in recipe.list_flavors():
+                view.record(flavor) if view.style == "json" else view.line(flavor)
+            view.flush()
+            return
+        found = recipe.find_recipe(parsed.name)
+        if found is None:
+            view.note(f"No recipe named '{parsed.name}'.")
+            view.flush()
+            raise SystemExit(1)
+        if parsed.command == "lookup":
+            if view.style == "json":
+                view.record(found.to_dict())
+            else:
+                view.line(recipe.recipe_line(view.c, recipe.index_of(found.name) + 1, found))
+            view.flush()
+        else:
+            receipt = Receipt(PricingEngine(), view.style)
+            receipt.add(1, found.list_recipe(), parse_size(parsed.size))
+            receipt.write()
+    elif parsed.command == "validate":
+        source = parsed.source or parsed.file
+        if not os.path.exists(source):
+            parser.error(f"no such file: '{source}'")
+        report = IngestReport(source, limit=max(parsed.show, 0))
+        for recipe in read_recipes(source, Recipe, report):
+            pass
+        if parsed.format == "json":
+            print(json.dumps(report.to_dict()))
+        else:
+            report.print_report()
+        if not report.ok:
+            raise SystemExit(1)
+    elif parsed.command == "similar":
+        recipe = Recipe_Manager(parsed.file)
+        view = Renderer(style=parsed.format)
+        matches = recipe.similar_recipes(parsed.name, parsed.k)
+        if matches is None:
+            view.note(f"No recipe named '{parsed.name}'.")
+            view.flush()
+            raise SystemExit(1)
+        for i, match in enumerate(matches, 1):
+            if view.style == "json":
+                view.record(match.to_dict())
+            else:
+                view.line(recipe.recipe_line(view.c, i, match))
+        view.flush()
+    elif parsed.command == "orders":
+        order_log = None if parsed.no_log else OrderLog(parsed.log)
+        inventory = None if parsed.no_log else Inventory(parsed.inventory, save_every=0)
+        try:
+            run_orders(Recipe_Manager(parsed.file, lazy=True, snapshot=True), parsed.source, order_log=order_log, inventory=inventory)
+        finally: # whatever was logged before a failure has also come out of stock
+            if inventory is not None:
+                inventory.save()
+    elif parsed.command == "report":
+        try: # check --since / --until up front, a bad one is a usage error and not a crash mid-report
+            for value in (parsed.since, parsed.until):
+                parse_time(value)
+        except ValueError as e:
+            parser.error(f"{e}, use unix seconds or YYYY-MM-DD[THH:MM]")
+        run_report(OrderLog(parsed.log), parsed.window, parsed.since, parsed.until, parsed.top, parsed.json)
+    elif parsed.command == "inventory":
+        inventory = Inventory(parsed.inventory, save_every=0)
+        try:
+            for option, apply in ((parsed.set, inventory.set_level), (parsed.restock, inventory.restock)):
+                for entry in option:
+                    key, _, amount = entry.rpartition("=")
+                    apply(key, int(amount))
+        except ValueError:
+            parser.error("levels look like KEY=N, e.g. syrup:Caramel=400")
+        if parsed.replay:
+            inventory.deplete(OrderLog(parsed.replay))
+        if parsed.set or parsed.restock or parsed.replay:
+            inventory.save()
+        if parsed.json:
+            print(json.dumps(inventory.forecast()))
+        else:
+            inventory.print_forecast()
+    elif parsed.command == "merge":
+        recipe = Recipe_Manager(parsed.source, workers=parsed.workers)
+        for conflict in recipe.conflicts:
+            print(f"Duplicate '{conflict['name']}': kept {conflict['kept']}, skipped {conflict['skipped']}")
+        recipe.save_recipe(parsed.into)
+        print(f"Wrote {len(recipe.recipes)} recipes to '{parsed.into}'")
+    elif parsed.command == "view":
+        recipe = Recipe_Manager(parsed.file, lazy=parsed.search is None, snapshot=True)
+        page = None
+        if parsed.page is not None or parsed.sort is not None:
+            page = max((parsed.page or 1) - 1, 0)
+        recipe.view_recipes(parsed.search, parsed.limit, page, parsed.page_size, style=parsed.format, sort=parsed.sort or "catalog")
+    elif parsed.command == "import-csv":
+        recipe = Recipe_Manager(parsed.file)
+        report = IngestReport(parsed.source)
+        result = recipe.add_many(recipe.csv_recipes(parsed.source, report))
+        report.print_errors()
+        print(f"Imported {len(result['added'])} recipes from '{parsed.source}' ({len(result['skipped'])} duplicate names skipped, {report.rejected} invalid rows)")
+    elif parsed.command == "export-csv":
+        recipe = Recipe_Manager(parsed.file)
+        recipe.save_recipe(parsed.target)
+        print(f"Exported {len(recipe.recipes)} recipes to '{parsed.target}'")
+
 def main():
-    ui = User_Interaction()
-    recipe = Recipe_Manager()
+    instrument.from_env(HOT_PATHS) # COFFEE_INSTRUMENT / COFFEE_PROFILE, off when unset
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
+        return
+    recipe = Recipe_Manager(snapshot=True)
+    ui = User_Interaction(recipe, order_log=OrderLog(), inventory=Inventory())
     while True:
         try:
             ui.main_menu()
             choice = input(f"Please enter the option number: ")
             choice = int(choice)
-            if choice <= 0 or choice > 6: # if choice isn't an option
+            if choice <= 0 or choice > len(ui.main_options): # if choice isn't an option
                 print(f"{choice} is not valid")
-            if choice == 6:
+            if choice == len(ui.main_options):
                 break
             else:
                 pass
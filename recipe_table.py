@@ -0,0 +1,92 @@
+from array import array
+import sys
+
+
+
+class RecipeTable:
+    # column store for big catalogs: one slot per field instead of one object per recipe.
+    # rows keep a stable id for their whole life, self.order holds the live ids in catalog order
+    # so positions (what the menus number) can shift without renumbering anything.
+    CREAMER = 1
+    SUGAR = 2
+    ICED = 4
+    MAX_COUNT = 2**31 - 1 # pumps / shots live in signed 32-bit columns, -1 meaning not set
+
+    def __init__(self, recipe_class):
+        self.recipe_class = recipe_class
+        self.names = []
+        self.flavors = array('I') # id into self.strings, 0 = no flavor
+        self.roasts = array('I')
+        self.pumps = array('i') # -1 = not set
+        self.shots = array('i')
+        self.flags = array('B') # CREAMER | SUGAR | ICED
+        self.order = array('I') # live row ids
+        self.strings = [None] # interned flavor/roast strings
+        self.string_ids = {None: 0}
+
+    def intern(self, value):
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(sys.intern(value))
+            self.string_ids[value] = string_id
+        return string_id
+
+    def append(self, recipe): # returns the row id, raises ValueError (before changing anything) for counts an 'i' can't hold
+        for field in ("pumps", "shots"):
+            count = getattr(recipe, field)
+            if count is not None and not 0 <= count <= self.MAX_COUNT:
+                raise ValueError(f"{field} {count!r} does not fit the columnar store")
+        row = len(self.names)
+        self.names.append(recipe.name)
+        self.flavors.append(self.intern(recipe.flavor or None))
+        self.roasts.append(self.intern(recipe.roast or None))
+        self.pumps.append(-1 if recipe.pumps is None else recipe.pumps)
+        self.shots.append(-1 if recipe.shots is None else recipe.shots)
+        self.flags.append(
+            (self.CREAMER if recipe.creamer else 0)
+            | (self.SUGAR if recipe.sugar else 0)
+            | (self.ICED if recipe.iced else 0)
+            )
+        self.order.append(row)
+        return row
+
+    def row(self, row): # build a Recipe for a row id
+        pumps = self.pumps[row]
+        shots = self.shots[row]
+        flags = self.flags[row]
+        return self.recipe_class(
+            name=self.names[row],
+            flavor=self.strings[self.flavors[row]],
+            pumps=None if pumps < 0 else pumps,
+            roast=self.strings[self.roasts[row]],
+            shots=None if shots < 0 else shots,
+            creamer=bool(flags & self.CREAMER),
+            sugar=bool(flags & self.SUGAR),
+            iced=bool(flags & self.ICED)
+            )
+
+    def pop(self, index=-1):
+        row = self.order.pop(index)
+        recipe = self.row(row)
+        self.names[row] = None # columns keep the dead slot so other row ids stay valid
+        return recipe
+
+    def retain(self, rows): # keep only the given row ids, in their current order
+        for row in self.order:
+            if row not in rows:
+                self.names[row] = None
+        self.order = array('I', [row for row in self.order if row in rows])
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(row) for row in self.order[index]]
+        return self.row(self.order[index])
+
+    def __iter__(self):
+        for row in self.order:
+            yield self.row(row)
+
@@ -0,0 +1,130 @@
+import json
+import sys
+
+import colors
+from pricing import SIZE_NAMES
+
+
+
+STYLES = ("ansi", "plain", "json")
+COLOR_NAMES = [name for name in vars(colors) if not name.startswith("_")]
+
+
+def pick_style(out=None, style=None): # ansi on a terminal, plain text when piped, unless asked for one
+    if style:
+        return style
+    out = out or sys.stdout
+    isatty = getattr(out, "isatty", None)
+    return "ansi" if isatty is not None and isatty() else "plain"
+
+
+class Palette:
+    # the colors.py names as attributes; all empty strings when escape codes are off
+    def __init__(self, enabled=True):
+        for name in COLOR_NAMES:
+            setattr(self, name, getattr(colors, name) if enabled else '')
+
+
+class Renderer:
+    # collects output lines and writes them in chunks, instead of one print (and one flush) per line
+    def __init__(self, out=None, style=None, chunk=2000):
+        self.out = out or sys.stdout
+        self.style = pick_style(self.out, style)
+        self.c = Palette(self.style == "ansi")
+        self.chunk = chunk
+        self.lines = []
+
+    def line(self, text=""):
+        self.lines.append(text)
+        if len(self.lines) >= self.chunk:
+            self.flush()
+
+    def record(self, value): # one JSON object per line in json style
+        self.line(json.dumps(value))
+
+    def note(self, text): # messages for people; in json style they become {"message": ...} lines
+        if self.style == "json":
+            self.record({"message": text})
+        else:
+            self.line(text)
+
+    def flush(self):
+        if self.lines:
+            self.lines.append("")
+            self.out.write("\n".join(self.lines))
+            self.lines = []
+        self.out.flush()
+
+
+class Receipt:
+    # one order session's receipt: line items are kept in a list and the whole receipt
+    # is joined and written once at the end, so long sessions don't re-copy the text per drink
+    def __init__(self, pricing, style="ansi"):
+        self.pricing = pricing
+        self.style = style
+        self.c = Palette(style == "ansi")
+        self.items = [] # receipt text per drink
+        self.records = [] # the same drinks as dicts, for json
+        self.orders = [] # (chosen_recipe, size), for the order log
+        self.subtotal = 0.0
+
+    def add(self, x, chosen_recipe, size): # price one drink, returns its subtotal
+        price = self.pricing.price_one(chosen_recipe, size)
+        self.items.append(self.item_text(x, chosen_recipe, size, price))
+        if chosen_recipe[0] == "Canceled":
+            self.records.append({"order": x, "canceled": True})
+        else:
+            self.records.append({
+                "order": x, "name": chosen_recipe[0], "size": SIZE_NAMES.get(int(size), ""),
+                "pump": int(price["pump"]), "shot": int(price["shot"]), "creamer": int(price["creamer"]),
+                "sugar": int(price["sugar"]), "subtotal": round(price["subtotal"], 2)
+            })
+        self.orders.append((chosen_recipe, size))
+        self.subtotal += price["subtotal"]
+        return price["subtotal"]
+
+    def item_text(self, x, chosen_recipe, size, price):
+        c = self.c
+        # the original widths count the escape codes, so pad less without them to line up the same
+        ansi = self.style == "ansi"
+        if chosen_recipe[0] == "Canceled":
+            receipt_item = f"{c.red} {x}. {'-' * 34} {chosen_recipe[0]}{c.default}"
+            width = 58 if ansi else 58 - len(colors.red + colors.default)
+            return f"{receipt_item:<{width}}\n"
+        size_str = SIZE_NAMES.get(int(size), "")
+        receipt_item = f" {x}. {c.green}{chosen_recipe[0]}{c.default} ({size_str})"
+        width = 58 if ansi else 58 - len(colors.green + colors.default)
+        return (
+            f"{receipt_item:<{width}}{price['size_total']:.2f}\n"
+            f"      {chosen_recipe[1]:<10}\t  Qty: {price['pump']:.0f}    {price['pump_total']:.2f}\n"
+            f"      {'espresso shots':<10}\t  Qty: {price['shot']:.0f}    {price['shot_total']:.2f}\n"
+            f"      {'cream':<10}\t  Qty: {price['creamer']:.0f}    {price['creamer_total']:.2f}\n"
+            f"      {'sugar':<10}\t  Qty: {price['sugar']:.0f}    {price['sugar_total']:.2f}\n"
+            f"\t\t\t\t\t  {c.orange}{price['subtotal']:>5.2f}{c.default}\n"
+        )
+
+    def text(self): # just the line items
+        return "".join(self.items)
+
+    def render(self):
+        tip, total = self.pricing.totals(self.subtotal)
+        if self.style == "json":
+            return json.dumps({
+                "items": self.records, "subtotal": round(self.subtotal, 2), "tip": round(tip, 2), "total": round(total, 2)
+            }) + "\n"
+        c = self.c
+        title = "Receipt"
+        tip_txt = f"{self.pricing.prices['tip'] * 100:.0f}% Gratuity:"
+        return "".join([
+            f"{c.borange}{title:^49}{c.default}\n",
+            "-" * 49, "\n",
+            self.text(), "\n",
+            f"{c.orange}{'Subtotal:':>33}{c.default}   {self.subtotal:.2f}\n",
+            f"{c.orange}{tip_txt:>33}{c.default}   {tip:.2f}\n",
+            f"{c.orange}{'Total:':>33}{c.default}{c.bold}{total:>14.2f}{c.default}\n"
+        ])
+
+    def write(self, out=None): # the whole receipt in one write
+        out = out or sys.stdout
+        out.write(self.render())
+        out.flush()
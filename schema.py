@@ -0,0 +1,231 @@
+import csv
+import gc
+from itertools import islice
+
+
+
+# what each recipes.csv column has to hold. pumps / shots and the three flags only ever take a handful
+# of distinct values, so each is converted through a lookup table that checks a value the first time it
+# is seen and then answers from the table; a whole batch of rows is converted in one comprehension over
+# those tables. a row with anything that doesn't fit is reported with its line number and never loaded
+FIELDNAMES = ["name", "flavor", "pumps", "roast", "shots", "creamer", "sugar", "iced"]
+
+BATCH_SIZE = 10000 # rows read and converted together
+TABLE_LIMIT = 4096 # most distinct values a lookup table remembers
+MAX_COUNT = 2**31 - 1 # most pumps / shots a recipe can have, what the columnar store and snapshot hold
+
+
+class RowError(ValueError):
+    def __init__(self, field, value, message):
+        super().__init__(f"{field} {value!r} {message}" if field else message)
+        self.field = field
+        self.value = value
+        self.message = message
+
+
+class Lookup(dict):
+    # raw text -> typed value, checked by convert the first time a value turns up
+    def __init__(self, field, convert, known):
+        super().__init__(known)
+        self.field = field
+        self.convert = convert
+
+    def __missing__(self, value):
+        converted = self.convert(self.field, value) # raises RowError
+        if len(self) < TABLE_LIMIT:
+            self[value] = converted
+        return converted
+
+
+def to_count(field, value): # blank, or a whole number of pumps / shots up to MAX_COUNT
+    if value.isascii() and value.isdigit():
+        count = int(value)
+        if count <= MAX_COUNT:
+            return count
+        raise RowError(field, value, f"is more than {MAX_COUNT}")
+    raise RowError(field, value, "is not a whole number")
+
+
+def to_flag(field, value): # True / False as save_recipe writes them, plus 1 / 0 and any case; blank is False
+    folded = value.strip().lower()
+    if folded in ("true", "1"):
+        return True
+    if folded in ("false", "0", ""):
+        return False
+    raise RowError(field, value, "is not True or False")
+
+
+def counts(field):
+    return Lookup(field, to_count, {'': None})
+
+
+def flags(field):
+    return Lookup(field, to_flag, {"True": True, "False": False, '': False})
+
+
+class IngestReport:
+    # what one pass over a csv found: how many rows were read and loaded, and the first `limit`
+    # problems (line, field, value, message) along with a count of all of them
+    def __init__(self, source, limit=100):
+        self.source = source
+        self.limit = limit
+        self.rows = 0 # data rows read, blank lines not counted
+        self.loaded = 0
+        self.errors = []
+        self.error_count = 0
+        self.rejected_rows = [] # raw text of every rejected row, so a save can write them back
+
+    def error(self, line, field, value, message):
+        self.error_count += 1
+        if len(self.errors) < self.limit:
+            self.errors.append((line, field, value, message))
+
+    @property
+    def ok(self):
+        return self.error_count == 0
+
+    @property
+    def rejected(self):
+        return self.rows - self.loaded
+
+    def describe(self, error):
+        line, field, value, message = error
+        return f"line {line}: {field} {value!r} {message}" if field else f"line {line}: {message}"
+
+    def to_dict(self):
+        return {
+            "source": self.source,
+            "rows": self.rows,
+            "loaded": self.loaded,
+            "rejected": self.rejected,
+            "error_count": self.error_count,
+            "errors": [
+                {"line": line, "field": field, "value": value, "message": message}
+                for line, field, value, message in self.errors
+            ]
+        }
+
+    def print_errors(self, shown=10, note="row skipped"): # the ERROR lines a load prints
+        for error in self.errors[:shown]:
+            print(f"ERROR: '{self.source}' {self.describe(error)} ({note})")
+        if self.error_count > shown:
+            print(f"ERROR: '{self.source}' has {self.error_count - shown} more problems, see: recipe_manager.py --file {self.source} validate")
+
+    def print_report(self):
+        print(f"{self.source}: {self.rows} rows, {self.loaded} valid, {self.rejected} rejected, {self.error_count} problems")
+        for error in self.errors:
+            print(f"  {self.describe(error)}")
+        if self.error_count > len(self.errors):
+            print(f"  ... {self.error_count - len(self.errors)} more")
+
+
+class Ingest:
+    # the schema for the eight FIELDNAMES columns, with its lookup tables built once and kept warm
+    # across every file read through it
+    def __init__(self):
+        self.pumps = counts("pumps")
+        self.shots = counts("shots")
+        self.creamer = flags("creamer")
+        self.sugar = flags("sugar")
+        self.iced = flags("iced")
+        self.tables = {"pumps": self.pumps, "shots": self.shots, "creamer": self.creamer, "sugar": self.sugar, "iced": self.iced}
+
+    def check_header(self, row, report):
+        if [value.strip().casefold() for value in row] != FIELDNAMES:
+            report.error(1, None, None, f"header should be {','.join(FIELDNAMES)}")
+
+    def convert_row(self, row): # one row -> typed values, raises RowError for the first thing wrong with it
+        if len(row) != len(FIELDNAMES):
+            raise RowError(None, None, f"expected {len(FIELDNAMES)} columns, found {len(row)}")
+        name, flavor, pumps, roast, shots, creamer, sugar, iced = row
+        if not name:
+            raise RowError("name", name, "is required")
+        return [
+            name, flavor or None, self.pumps[pumps], roast or None, self.shots[shots],
+            self.creamer[creamer], self.sugar[sugar], self.iced[iced]
+        ]
+
+    def convert_value(self, field, value):
+        # one value from JSON (text, a number, true / false or null) checked the way the csv cell holding
+        # its text would be: blank text fields are None, counts must be whole and not negative
+        if value is None:
+            value = ''
+        elif isinstance(value, (str, int, float)):
+            value = str(value) # true / false come out as True / False
+        else:
+            raise RowError(field, value, "is not text, a number or true / false")
+        table = self.tables.get(field)
+        if table is None:
+            return value or None
+        return table[value]
+
+    def convert(self, rows, build, lines, report):
+        # one batch of rows -> build(*typed values) for each valid one; lines(i) is the line row i started on
+        P, S, C, G, I = self.pumps, self.shots, self.creamer, self.sugar, self.iced
+        try: # every row fits: one pass, no per-row checks beyond the tables'
+            built = [
+                build(name or missing(), flavor or None, P[pumps], roast or None, S[shots], C[creamer], G[sugar], I[iced])
+                for name, flavor, pumps, roast, shots, creamer, sugar, iced in rows
+            ]
+            report.rows += len(rows)
+        except ValueError: # a RowError, or a row with the wrong number of columns: go row by row to find them
+            built = []
+            for i, row in enumerate(rows):
+                if not row: # blank line
+                    continue
+                report.rows += 1
+                try:
+                    built.append(build(*self.convert_row(row)))
+                except RowError as e:
+                    report.error(lines(i), e.field, e.value, e.message)
+                    report.rejected_rows.append(row)
+        report.loaded += len(built)
+        return built
+
+    def read(self, file, build, report, header=True, batch_size=BATCH_SIZE):
+        # yields build(*typed values) for every valid row of an open csv, a batch at a time
+        reader = csv.reader(file)
+        if header:
+            row = next(reader, None)
+            if row is None:
+                return
+            self.check_header(row, report)
+        while True:
+            # a batch allocates tens of thousands of objects that all live on, so the cyclic gc would run
+            # over and over finding nothing; hold it off while one is built (the caller's code runs with it on)
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                start = reader.line_num # line the batch's first row starts after
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    return
+                if reader.line_num - start == len(rows): # one line per row, nothing quoted across lines
+                    lines = lambda i, start=start: start + 1 + i
+                else:
+                    lines = line_finder(rows, start)
+                built = self.convert(rows, build, lines, report)
+            finally:
+                if collecting:
+                    gc.enable()
+            yield from built
+
+
+def missing():
+    raise RowError("name", "", "is required")
+
+
+def line_finder(rows, start): # line numbers for a batch where quoted newlines make some rows span lines
+    def lines(i):
+        return start + 1 + i + sum(value.count("\n") for row in rows[:i] for value in row)
+    return lines
+
+
+ingest = Ingest()
+
+
+def read_recipes(filename, build, report=None, header=True):
+    # every valid row of a csv, built with build(name, flavor, pumps, roast, shots, creamer, sugar, iced)
+    report = report if report is not None else IngestReport(filename)
+    with open(filename, mode='r', newline='', encoding='utf-8') as file:
+        yield from ingest.read(file, build, report, header)
@@ -0,0 +1,119 @@
+from array import array
+import heapq
+
+
+
+def trigrams(text): # padded so short words and word edges still produce grams
+    text = f"  {text.casefold()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def inner_trigrams(term): # grams every string containing term must also contain
+    term = term.casefold()
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+class SearchIndex:
+    # trigram inverted index over recipe names and flavors.
+    # documents get increasing ids, so posting arrays stay sorted in catalog order;
+    # removed ids are only tombstoned and the postings get rebuilt once enough pile up
+    CANDIDATE_BUDGET = 60000 # most posting entries search() will read per query
+
+    def __init__(self):
+        self.postings = {} # trigram -> array of doc ids
+        self.docs = {} # doc id -> (name key, flavor key)
+        self.ids = {} # name key -> doc id
+        self.next_id = 0
+        self.dead = 0
+
+    def add(self, key, flavor=None):
+        doc_id = self.next_id
+        self.next_id += 1
+        flavor = flavor.casefold() if flavor else ''
+        self.docs[doc_id] = (key, flavor)
+        self.ids[key] = doc_id
+        for gram in trigrams(key) | (trigrams(flavor) if flavor else set()):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(doc_id)
+
+    def remove(self, key):
+        doc_id = self.ids.pop(key, None)
+        if doc_id is None:
+            return
+        del self.docs[doc_id]
+        self.dead += 1
+        if self.dead > 1000 and self.dead > len(self.docs):
+            self.rebuild()
+
+    def rebuild(self): # drop tombstoned ids from every posting
+        postings = {}
+        for doc_id, (key, flavor) in self.docs.items():
+            for gram in trigrams(key) | (trigrams(flavor) if flavor else set()):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(doc_id)
+        self.postings = postings
+        self.dead = 0
+
+    def substring(self, term): # name keys containing term, in catalog order
+        term = term.casefold()
+        grams = inner_trigrams(term)
+        if grams:
+            postings = [self.postings.get(gram) for gram in grams]
+            if any(posting is None for posting in postings):
+                return []
+            candidates = min(postings, key=len)
+        else: # under three characters there is nothing to look up, check every name
+            candidates = self.docs
+        docs = self.docs
+        matches = []
+        for doc_id in candidates:
+            doc = docs.get(doc_id)
+            if doc is not None and term in doc[0]:
+                matches.append(doc[0])
+        return matches
+
+    def search(self, query, k=10): # typo-tolerant ranked search, returns up to k (score, name key)
+        query = query.casefold().strip()
+        if not query:
+            return []
+        # names that contain the query outright come first, shortest (closest) names on top
+        exact = heapq.nsmallest(k, self.substring(query), key=len)
+        results = [(round(2.0 - len(key) / 1000, 3), key) for key in exact]
+        if len(results) < k:
+            taken = set(exact)
+            results += [hit for hit in self.fuzzy(query, k) if hit[1] not in taken][:k - len(results)]
+        return results
+
+    def fuzzy(self, query, k):
+        grams = trigrams(query)
+        postings = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+        # count shared grams using the rarest postings first, stop once the budget is spent
+        hits = {}
+        budget = self.CANDIDATE_BUDGET
+        for posting in postings:
+            if budget <= 0:
+                break
+            budget -= len(posting)
+            for doc_id in posting:
+                hits[doc_id] = hits.get(doc_id, 0) + 1
+        docs = self.docs
+        scored = []
+        for doc_id in heapq.nlargest(k * 20, hits, key=hits.get): # rescore only the best candidates exactly
+            doc = docs.get(doc_id)
+            if doc is None:
+                continue
+            key, flavor = doc
+            in_name = grams & trigrams(key)
+            in_flavor = (grams & trigrams(flavor)) - in_name if flavor else set()
+            if (len(in_name) + len(in_flavor)) * 3 < len(grams): # too little overlap to be a typo of the query
+                continue
+            score = (len(in_name) + len(in_flavor) / 2) / len(grams) # share of the query found, names count double
+            if query in flavor:
+                score += 0.5
+            score -= len(key) / 1000 # prefer shorter names on ties
+            scored.append((score, -doc_id, key))
+        return [(round(score, 3), key) for score, neg_id, key in heapq.nlargest(k, scored)]
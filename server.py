@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from inventory import Inventory
+from order_log import OrderLog
+from orders import OrderSession, order_problem
+from recipe_manager import Recipe_Manager
+
+
+
+class RecipeServer:
+    # small HTTP/1.1 JSON service over one shared Recipe_Manager so several registers can use one catalog.
+    # reads run straight on the event loop; adds and deletes go through a queue that a single
+    # writer task drains, so mutations (and their disk writes) never interleave.
+    #
+    #   GET    /recipes/<name>        lookup
+    #   GET    /search?q=...&k=10     ranked search
+    #   GET    /flavors               flavor list
+    #   POST   /orders                one order or a list of orders (see orders.OrderSession)
+    #   POST   /recipes               add {"name", "flavor", "pumps", "roast", "shots", "creamer", "sugar", "iced"}
+    #   DELETE /recipes/<name>        delete
+    def __init__(self, recipe_manager, host="127.0.0.1", port=8765, order_log=None, inventory=None):
+        self.recipe_manager = recipe_manager
+        self.order_log = order_log
+        self.inventory = inventory # saves itself every Inventory.save_every orders and on stop
+        self.host = host
+        self.port = port
+        self.writes = None
+        self.server = None
+        self.connections = set() # open client writers, closed on stop so wait_closed can finish
+        self.handlers = set() # their handle tasks, waited for on stop so none is left to be cancelled at exit
+
+    async def start(self):
+        self.writes = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.writer())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1] # in case port 0 was asked for
+        return self
+
+    async def stop(self):
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        self.writer_task.cancel()
+        if self.inventory is not None:
+            self.inventory.save()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Serving '{self.recipe_manager.filename}' on http://{self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def writer(self): # the only place the catalog gets changed
+        while True:
+            action, payload, done = await self.writes.get()
+            try:
+                result = action(payload)
+            except Exception as e:
+                if not done.cancelled(): # the client went away while it waited
+                    done.set_exception(e)
+                continue
+            if not done.cancelled():
+                done.set_result(result)
+
+    async def mutate(self, action, payload):
+        done = asyncio.get_running_loop().create_future()
+        await self.writes.put((action, payload, done))
+        return await done
+
+    def add(self, fields):
+        manager = self.recipe_manager
+        if not isinstance(fields, dict):
+            return 400, {"error": "recipe must be an object of recipe fields"}
+        if not fields.get("name") or not isinstance(fields["name"], str):
+            return 400, {"error": "must provide a name"}
+        for field in manager.FIELDNAMES:
+            if not isinstance(fields.get(field), (str, int, float, type(None))):
+                return 400, {"error": f"{field} must be text, a number or true / false"}
+        if manager.has_name(fields["name"]):
+            return 409, {"error": f"cannot add '{fields['name']}' (Duplicate name)"}
+        try:
+            recipe = manager.row_to_recipe([
+                str(fields.get(field, '') if fields.get(field) is not None else '') for field in manager.FIELDNAMES
+                ])
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        manager.ensure_loaded()
+        if not manager.store_recipe(recipe) or not manager.commit_add(recipe): # another register added it first
+            return 409, {"error": f"cannot add '{recipe.name}' (Duplicate name)"}
+        return 201, {"recipe": recipe.list_recipe()}
+
+    def delete(self, name): # through the name index, and without del_recipe's message on the server's stdout
+        result = self.recipe_manager.delete_many([name])
+        if result["missing"]:
+            return 404, {"error": f"no recipe named '{name}'"}
+        return 200, {"deleted": result["deleted"][0]}
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        manager = self.recipe_manager
+        if method == "GET" and path.startswith("/recipes/"):
+            name = path[len("/recipes/"):]
+            found = manager.exact_match(name) if name and manager.recipes else None # exact_match('') is the first recipe
+            if found is None:
+                return 404, {"error": "not found"}
+            return 200, {"recipe": found}
+        if method == "GET" and path == "/search":
+            term = query.get("q", [''])[0]
+            k = int(query.get("k", ['10'])[0])
+            return 200, {"results": [recipe.list_recipe() for recipe in manager.search_recipes(term, k)]}
+        if method == "GET" and path == "/flavors":
+            return 200, {"flavors": manager.list_flavors()}
+        if method == "POST" and path == "/orders":
+            orders = json.loads(body or b'[]')
+            if not isinstance(orders, (dict, list)):
+                return 400, {"error": "orders must be an order object or a list of them"}
+            problem = order_problem(orders) if isinstance(orders, dict) else None
+            if problem is not None: # one order, nothing else to price (a list gets an error receipt per bad order)
+                return 400, {"error": problem}
+            session = OrderSession(manager, order_log=self.order_log, inventory=self.inventory)
+            receipts = list(session.process(orders if isinstance(orders, list) else [orders]))
+            return 200, {"receipts": receipts, "summary": session.close()}
+        if method == "POST" and path == "/recipes":
+            return await self.mutate(self.add, json.loads(body or b'{}'))
+        if method == "DELETE" and path.startswith("/recipes/"):
+            return await self.mutate(self.delete, path[len("/recipes/"):])
+        return 404, {"error": f"no route for {method} {path}"}
+
+    async def handle(self, reader, writer): # one connection, any number of keep-alive requests
+        self.connections.add(writer)
+        self.handlers.add(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await self.route(method, target, body)
+                except (ValueError, KeyError, TypeError) as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e: # still answer, rather than drop the connection with nothing sent
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+                    )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+
+async def request(reader, writer, method, path, payload=None): # minimal keep-alive client used by load_test
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def load_test(host, port, names, requests=10000, concurrency=32):
+    # mixed lookup/search/order traffic from several connections, reports requests/sec and latency
+    latencies = []
+    per_client = requests // concurrency
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        for i in range(per_client):
+            name = random.choice(names)
+            kind = random.random()
+            start = time.perf_counter()
+            if kind < .5:
+                await request(reader, writer, "GET", f"/recipes/{quote(name)}")
+            elif kind < .7:
+                await request(reader, writer, "GET", f"/search?q={quote(name[:5])}&k=5")
+            else:
+                await request(reader, writer, "POST", "/orders", {"recipe": name, "size": random.choice("sml")})
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * .99))] * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recipe service and load generator")
+    parser.add_argument("--file", default="recipes.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--log", default="orders.log", help="order log for POST /orders (default: orders.log)")
+    parser.add_argument("--inventory", default="inventory.json", help="stock file POST /orders depletes (default: inventory.json)")
+    parser.add_argument("--bench", action="store_true", help="start a server in-process and load test it")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    manager = Recipe_Manager(args.file, journal=True) # journal keeps each add/delete to one appended line
+    if not args.bench:
+        server = RecipeServer(manager, args.host, args.port, OrderLog(args.log), Inventory(args.inventory))
+        try:
+            asyncio.run(server.serve_forever())
+        finally:
+            server.inventory.save()
+        return
+
+    async def bench():
+        server = await RecipeServer(manager, args.host, 0).start()
+        names = [recipe.name for recipe in manager.recipes] or ["Custom coffee"]
+        result = await load_test(args.host, server.port, names, args.requests, args.concurrency)
+        await server.stop()
+        return result
+
+    print(json.dumps(asyncio.run(bench())))
+
+
+if __name__ == '__main__':
+    main()
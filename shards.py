@@ -0,0 +1,34 @@
+import glob
+import os
+
+from schema import IngestReport, read_recipes
+
+
+
+def is_sharded(source): # a folder of csvs or a glob like stores/*.csv
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+def find_shards(source): # sorted so merges (and their conflict reports) come out the same every time
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+    return sorted(glob.glob(source))
+
+
+def typed_row(*values):
+    return values
+
+
+def read_shard(path): # (typed rows, IngestReport) of one shard, invalid rows left out (runs in a worker process)
+    report = IngestReport(path)
+    return list(read_recipes(path, typed_row, report)), report
+
+
+def read_shards(paths, workers=None): # yields (path, (rows, report)) in path order, parsing shards in parallel
+    if len(paths) < 2 or workers == 1:
+        for path in paths:
+            yield path, read_shard(path)
+        return
+    from concurrent.futures import ProcessPoolExecutor # pulls in multiprocessing, so only when there are shards
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from zip(paths, pool.map(read_shard, paths))
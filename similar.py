@@ -0,0 +1,118 @@
+from array import array
+import heapq
+
+from pricing import load_numpy
+
+
+
+# how far apart two recipes are is a weighted sum over their feature vectors:
+# a different flavor costs the most, then a different roast, then each pump / shot of difference,
+# then each add-in (creamer, sugar, iced) one has and the other doesn't
+WEIGHTS = (3.0, 1.5, 0.5, 1.0, 1.0, 0.5, 0.5) # flavor, roast, pumps, shots, creamer, sugar, iced
+
+NUMPY_MIN_PROFILES = 256 # fewer distinct vectors than this are quicker to score in a plain loop
+
+
+class SimilarIndex:
+    # nearest-neighbour index over recipe feature vectors. catalogs repeat the same few vectors a lot
+    # (a flavor, a roast, a couple of pumps and shots), so the index stores each distinct vector once as a
+    # profile, in one array per feature, with the name keys that have it. a query scores every profile in
+    # one vectorized pass and only looks at names in the closest ones, so it costs the number of distinct
+    # vectors, not the number of recipes. adds and deletes only touch the recipe's profile
+    def __init__(self):
+        self.columns = tuple(array('d') for _ in WEIGHTS) # one value per profile per feature
+        self.counts = array('I') # live recipes per profile
+        self.members = [] # profile id -> {name key: None}, in the order they were added
+        self.profiles = {} # vector -> profile id
+        self.keys = {} # name key -> profile id
+        self.strings = {} # casefolded flavor / roast -> id, so they can be compared as numbers
+
+    def code(self, value): # 0 for no flavor / roast
+        if not value:
+            return 0
+        value = value.casefold()
+        code = self.strings.get(value)
+        if code is None:
+            code = self.strings[value] = len(self.strings) + 1
+        return code
+
+    def vector(self, recipe):
+        return (
+            self.code(recipe.flavor),
+            self.code(recipe.roast),
+            recipe.pumps or 0,
+            recipe.shots or 0,
+            1 if recipe.creamer else 0,
+            1 if recipe.sugar else 0,
+            1 if recipe.iced else 0
+        )
+
+    def add(self, key, recipe):
+        vector = self.vector(recipe)
+        profile = self.profiles.get(vector)
+        if profile is None:
+            profile = self.profiles[vector] = len(self.members)
+            for column, value in zip(self.columns, vector):
+                column.append(value)
+            self.counts.append(0)
+            self.members.append({})
+        self.members[profile][key] = None
+        self.counts[profile] += 1
+        self.keys[key] = profile
+
+    def remove(self, key): # an emptied profile stays, with a count of 0, for the next recipe like it
+        profile = self.keys.pop(key, None)
+        if profile is None:
+            return
+        del self.members[profile][key]
+        self.counts[profile] -= 1
+
+    def __len__(self):
+        return len(self.keys)
+
+    def distances(self, vector): # distance from vector to every profile, empty ones as infinity
+        w_flavor, w_roast, w_pumps, w_shots, w_creamer, w_sugar, w_iced = WEIGHTS
+        f, r, p, s, c, su, i = vector
+        np = load_numpy() if len(self.counts) >= NUMPY_MIN_PROFILES else None
+        if np is None:
+            distance = []
+            for count, flavor, roast, pumps, shots, creamer, sugar, iced in zip(self.counts, *self.columns):
+                distance.append(float("inf") if not count else (
+                    w_flavor * (flavor != f) + w_roast * (roast != r) + w_pumps * abs(pumps - p) + w_shots * abs(shots - s)
+                    + w_creamer * (creamer != c) + w_sugar * (sugar != su) + w_iced * (iced != i)
+                ))
+            return None, distance
+        flavor, roast, pumps, shots, creamer, sugar, iced = (np.frombuffer(column, dtype=np.float64) for column in self.columns)
+        distance = (
+            w_flavor * (flavor != f) + w_roast * (roast != r) + w_pumps * np.abs(pumps - p) + w_shots * np.abs(shots - s)
+            + w_creamer * (creamer != c) + w_sugar * (sugar != su) + w_iced * (iced != i)
+        )
+        distance[np.frombuffer(self.counts, dtype=np.uint32) == 0] = np.inf
+        return np, distance
+
+    def nearest(self, recipe, k=5, exclude=None):
+        # up to k (distance, name key) closest to recipe, closest first; ties go to the older profile,
+        # then catalog order. exclude is a name key to leave out, usually the recipe's own
+        if k <= 0 or not self.counts:
+            return []
+        np, distance = self.distances(self.vector(recipe))
+        # k + 1 non-empty profiles hold at least k names besides exclude; every profile tied with the
+        # last of them comes too, so the cut doesn't depend on how ties happened to be ordered
+        want = min(k + 1, len(self.counts))
+        if np is not None:
+            cutoff = np.partition(distance, want - 1)[want - 1]
+            candidates = np.flatnonzero(distance <= cutoff)
+            ranked = sorted(zip(distance[candidates].tolist(), candidates.tolist()))
+        else:
+            cutoff = heapq.nsmallest(want, distance)[-1]
+            ranked = sorted((d, profile) for profile, d in enumerate(distance) if d <= cutoff)
+        results = []
+        for d, profile in ranked:
+            if d == float("inf"):
+                break
+            for key in self.members[profile]:
+                if key != exclude:
+                    results.append((d, key))
+                    if len(results) == k:
+                        return results
+        return results
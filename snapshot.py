@@ -0,0 +1,174 @@
+import mmap
+import os
+import struct
+import zlib
+
+
+
+# compiled, read-only copy of a catalog that can be mmapped instead of parsing the csv.
+#
+#   header    magic, counts, hash slot count, (mtime_ns, size) of the csv it was built from
+#   records   one fixed-width RECORD per recipe, in catalog order
+#   offsets   string start offsets (one extra at the end) into the string blob
+#   flavors   string ids of the distinct flavors, in order of first appearance
+#   slots     open-addressing hash table on crc32(name key): record number + 1, 0 = empty
+#   strings   utf-8 blob holding names, flavors and roasts (flavors/roasts stored once each)
+MAGIC = b'RCPSNAP1'
+HEADER = struct.Struct('<8sIIIIqq') # magic, records, strings, flavors, slots, csv mtime_ns, csv size
+RECORD = struct.Struct('<IIIiiB3x') # name id, flavor id, roast id, pumps, shots, flags (-1 / id 0 = not set)
+CREAMER = 1
+SUGAR = 2
+ICED = 4
+
+
+def slot_hash(key):
+    return zlib.crc32(key.encode('utf-8'))
+
+
+def write_snapshot(path, recipes, source_stamp, name_key):
+    # recipes is any iterable of Recipe, source_stamp the (mtime_ns, size) of the csv they came from.
+    # returns False and writes nothing if a recipe doesn't fit a RECORD (e.g. pumps past 2**31),
+    # so the catalog just loads from the csv instead of the load failing
+    strings = [""]
+    string_ids = {None: 0}
+    def intern(value):
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(strings)
+            strings.append(value)
+        return string_id
+    records = bytearray()
+    keys = []
+    flavors = {}
+    for recipe in recipes:
+        flavor_id = intern(recipe.flavor or None)
+        if recipe.flavor:
+            flavors.setdefault(flavor_id, None)
+        try:
+            records += RECORD.pack(
+                intern(recipe.name), flavor_id, intern(recipe.roast or None),
+                -1 if recipe.pumps is None else recipe.pumps,
+                -1 if recipe.shots is None else recipe.shots,
+                (CREAMER if recipe.creamer else 0) | (SUGAR if recipe.sugar else 0) | (ICED if recipe.iced else 0)
+                )
+        except struct.error:
+            return False
+        keys.append(name_key(recipe.name))
+    slot_count = 1
+    while slot_count < len(keys) * 2: # keep the table at most half full so probes stay short
+        slot_count *= 2
+    slots = [0] * slot_count
+    for number, key in enumerate(keys):
+        slot = slot_hash(key) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = number + 1
+    blob = bytearray()
+    offsets = []
+    for value in strings:
+        offsets.append(len(blob))
+        blob += value.encode('utf-8')
+    offsets.append(len(blob))
+    temp_name = path + ".tmp"
+    with open(temp_name, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(keys), len(strings), len(flavors), slot_count, source_stamp[0], source_stamp[1]))
+        file.write(records)
+        file.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+        file.write(struct.pack(f'<{len(flavors)}I', *flavors))
+        file.write(struct.pack(f'<{slot_count}I', *slots))
+        file.write(blob)
+    os.replace(temp_name, path)
+    return True
+
+
+def read_source_stamp(path): # (mtime_ns, size) the snapshot was built from, None if unreadable
+    try:
+        with open(path, 'rb') as file:
+            magic, count, strings, flavors, slots, mtime_ns, size = HEADER.unpack(file.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC:
+        return None
+    return (mtime_ns, size)
+
+
+class Snapshot:
+    # mmapped view of a snapshot file; acts like the recipes list (len, [i], [a:b], iteration)
+    # and answers name lookups through the hash slots without reading anything else
+    def __init__(self, path, recipe_class, name_key):
+        self.recipe_class = recipe_class
+        self.name_key = name_key
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, string_count, flavor_count, self.slot_count, mtime_ns, size = HEADER.unpack_from(self.map, 0)
+        self.source_stamp = (mtime_ns, size)
+        self.records_at = HEADER.size
+        self.offsets_at = self.records_at + self.count * RECORD.size
+        self.flavors_at = self.offsets_at + (string_count + 1) * 8
+        self.slots_at = self.flavors_at + flavor_count * 4
+        self.strings_at = self.slots_at + self.slot_count * 4
+        self.flavor_count = flavor_count
+
+    def close(self):
+        self.map.close()
+
+    def string(self, string_id):
+        if string_id == 0:
+            return None
+        start, end = struct.unpack_from('<QQ', self.map, self.offsets_at + string_id * 8)
+        return str(self.map[self.strings_at + start:self.strings_at + end], 'utf-8')
+
+    def record(self, number):
+        name_id, flavor_id, roast_id, pumps, shots, flags = RECORD.unpack_from(self.map, self.records_at + number * RECORD.size)
+        return self.recipe_class(
+            name=self.string(name_id),
+            flavor=self.string(flavor_id),
+            pumps=None if pumps < 0 else pumps,
+            roast=self.string(roast_id),
+            shots=None if shots < 0 else shots,
+            creamer=bool(flags & CREAMER),
+            sugar=bool(flags & SUGAR),
+            iced=bool(flags & ICED)
+            )
+
+    def find(self, key): # record number for a name key, None if missing
+        mask = self.slot_count - 1
+        slot = slot_hash(key) & mask
+        while True:
+            number = struct.unpack_from('<I', self.map, self.slots_at + slot * 4)[0]
+            if number == 0:
+                return None
+            name_id = struct.unpack_from('<I', self.map, self.records_at + (number - 1) * RECORD.size)[0]
+            if self.name_key(self.string(name_id)) == key:
+                return number - 1
+            slot = (slot + 1) & mask
+
+    def get(self, key):
+        number = self.find(key)
+        return None if number is None else self.record(number)
+
+    def contains(self, key):
+        return self.find(key) is not None
+
+    def index_of(self, key):
+        return self.find(key)
+
+    def flavors(self):
+        ids = struct.unpack_from(f'<{self.flavor_count}I', self.map, self.flavors_at)
+        return [self.string(string_id) for string_id in ids]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(number) for number in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("recipe index out of range")
+        return self.record(index)
+
+    def __iter__(self):
+        for number in range(self.count):
+            yield self.record(number)
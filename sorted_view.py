@@ -0,0 +1,39 @@
+from bisect import bisect_left, insort
+
+
+
+SORTS = ("catalog", "name", "flavor", "roast", "shots")
+
+
+def sort_value(sort, recipe, key):
+    # tuple the catalog is ordered by; recipes missing the field go last and ties go by name,
+    # and the name key always comes last so the tuple alone says which recipe it is
+    if sort == "name":
+        return (key,)
+    value = getattr(recipe, sort)
+    if sort == "shots":
+        return (value is None or value == '', value if isinstance(value, int) else 0, key)
+    return (not value, value.casefold() if value else '', key)
+
+
+class SortedView:
+    # every recipe's sort_value in order, so any page is a slice of this list instead of a sort.
+    # adds and deletes keep it in order with a binary search rather than rebuilding it
+    def __init__(self, sort, recipes, name_key):
+        self.sort = sort
+        self.values = sorted(sort_value(sort, recipe, name_key(recipe.name)) for recipe in recipes)
+
+    def add(self, recipe, key):
+        insort(self.values, sort_value(self.sort, recipe, key))
+
+    def remove(self, recipe, key):
+        value = sort_value(self.sort, recipe, key)
+        i = bisect_left(self.values, value)
+        if i < len(self.values) and self.values[i] == value:
+            del self.values[i]
+
+    def keys(self, start, stop): # name keys of one page
+        return [value[-1] for value in self.values[start:stop]]
+
+    def __len__(self):
+        return len(self.values)
@@ -0,0 +1,180 @@
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def is_sqlite(filename):
+    return filename.lower().endswith(SQLITE_EXTENSIONS)
+
+
+class SQLiteStorage:
+    # recipe catalog kept in a SQLite file instead of recipes.csv.
+    # it answers the keyed queries Recipe_Manager needs (get / contains / filter / flavors / search)
+    # straight from indexed columns, and it also acts like the list in Recipe_Manager.recipes
+    # (len, [i], [a:b], iteration, pop) so the menus can number and delete recipes without loading them all.
+    # keys are name_key(name), the same case-folded names Recipe_Manager uses for duplicates.
+    BATCH_SIZE = 10000 # rows per transaction for bulk imports
+
+    COLUMNS = "name, flavor, pumps, roast, shots, creamer, sugar, iced"
+    INSERT = "INTO recipes (name, name_key, flavor, pumps, roast, shots, creamer, sugar, iced) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+    def __init__(self, filename, recipe_class, name_key):
+        import sqlite3 # only runs that open a .db pay for importing it
+        self.IntegrityError = sqlite3.IntegrityError
+        self.filename = filename
+        self.recipe_class = recipe_class
+        self.name_key = name_key
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS recipes (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL UNIQUE,
+                flavor TEXT,
+                pumps INTEGER,
+                roast TEXT,
+                shots INTEGER,
+                creamer INTEGER NOT NULL DEFAULT 0,
+                sugar INTEGER NOT NULL DEFAULT 0,
+                iced INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS recipes_flavor ON recipes (flavor);
+            CREATE INDEX IF NOT EXISTS recipes_roast ON recipes (roast);
+        ''')
+
+    def close(self):
+        self.connection.close()
+
+    def to_row(self, recipe):
+        return (
+            recipe.name, self.name_key(recipe.name), recipe.flavor, recipe.pumps, recipe.roast, recipe.shots,
+            int(recipe.creamer), int(recipe.sugar), int(recipe.iced)
+        )
+
+    def to_recipe(self, row):
+        name, flavor, pumps, roast, shots, creamer, sugar, iced = row
+        return self.recipe_class(name, flavor, pumps, roast, shots, bool(creamer), bool(sugar), bool(iced))
+
+    def query(self, sql, params=()):
+        return [self.to_recipe(row) for row in self.connection.execute(sql, params)]
+
+    # keyed queries
+
+    def get(self, key):
+        row = self.connection.execute(f"SELECT {self.COLUMNS} FROM recipes WHERE name_key = ?", (key,)).fetchone()
+        return None if row is None else self.to_recipe(row)
+
+    def contains(self, key):
+        return self.connection.execute("SELECT 1 FROM recipes WHERE name_key = ?", (key,)).fetchone() is not None
+
+    def add(self, recipe): # returns False if the name is already taken
+        try:
+            with self.connection:
+                self.connection.execute(f"INSERT {self.INSERT}", self.to_row(recipe))
+        except self.IntegrityError:
+            return False
+        return True
+
+    def add_many(self, recipes):
+        # one transaction per BATCH_SIZE rows, returns {"added": names, "skipped": names already taken}
+        result = {"added": [], "skipped": []}
+        batch = []
+        for recipe in recipes:
+            batch.append(recipe)
+            if len(batch) >= self.BATCH_SIZE:
+                self.insert_batch(batch, result)
+                batch = []
+        if batch:
+            self.insert_batch(batch, result)
+        return result
+
+    def insert_batch(self, recipes, result): # each recipe goes in result by whether its own insert wrote a row
+        sql = f"INSERT OR IGNORE {self.INSERT}"
+        with self.connection:
+            for recipe in recipes:
+                inserted = self.connection.execute(sql, self.to_row(recipe)).rowcount
+                result["added" if inserted else "skipped"].append(recipe.name)
+
+    def delete(self, key): # returns the removed recipe or None
+        recipe = self.get(key)
+        if recipe is not None:
+            with self.connection:
+                self.connection.execute("DELETE FROM recipes WHERE name_key = ?", (key,))
+        return recipe
+
+    def delete_many(self, keys): # returns how many were removed
+        with self.connection:
+            return self.connection.executemany("DELETE FROM recipes WHERE name_key = ?", ((key,) for key in keys)).rowcount
+
+    def flavors(self): # in order of first appearance, like list_flavors
+        return [row[0] for row in self.connection.execute(
+            "SELECT flavor FROM recipes WHERE flavor IS NOT NULL AND flavor != '' GROUP BY flavor ORDER BY MIN(id)"
+            )]
+
+    def filter(self, flavor=None, roast=None, creamer=None, sugar=None, iced=None):
+        clauses = []
+        params = []
+        for column, value in (("flavor", flavor), ("roast", roast)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for column, value in (("creamer", creamer), ("sugar", sugar), ("iced", iced)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(int(value))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.query(f"SELECT {self.COLUMNS} FROM recipes{where} ORDER BY id", params)
+
+    def search(self, term, limit=None): # names containing term, in catalog order
+        escaped = term.casefold().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql = f"SELECT {self.COLUMNS} FROM recipes WHERE name_key LIKE ? ESCAPE '\\' ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, (f"%{escaped}%",))
+
+    ORDER_BY = {
+        "catalog": "id",
+        "name": "name_key",
+        "flavor": "flavor IS NULL OR flavor = '', flavor COLLATE NOCASE, name_key",
+        "roast": "roast IS NULL OR roast = '', roast COLLATE NOCASE, name_key",
+        "shots": "shots IS NULL, shots, name_key"
+    }
+
+    def page(self, sort, offset, limit): # one page of the catalog in a sorted_view.SORTS order
+        return self.query(f"SELECT {self.COLUMNS} FROM recipes ORDER BY {self.ORDER_BY[sort]} LIMIT ? OFFSET ?", (limit, offset))
+
+    def index_of(self, key): # catalog position, None if missing
+        row = self.connection.execute("SELECT id FROM recipes WHERE name_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return self.connection.execute("SELECT COUNT(*) FROM recipes WHERE id < ?", row).fetchone()[0]
+
+    # list-like access, positions follow insertion order
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def __bool__(self):
+        return self.connection.execute("SELECT 1 FROM recipes LIMIT 1").fetchone() is not None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self[start:stop][::step]
+            return self.query(f"SELECT {self.COLUMNS} FROM recipes ORDER BY id LIMIT ? OFFSET ?", (max(stop - start, 0), start))
+        if index < 0:
+            index += len(self)
+        recipes = self.query(f"SELECT {self.COLUMNS} FROM recipes ORDER BY id LIMIT 1 OFFSET ?", (index,)) if index >= 0 else []
+        if not recipes:
+            raise IndexError("recipe index out of range")
+        return recipes[0]
+
+    def __iter__(self): # streams from a cursor, nothing is held beyond the current row
+        for row in self.connection.execute(f"SELECT {self.COLUMNS} FROM recipes ORDER BY id"):
+            yield self.to_recipe(row)
+
+    def pop(self, index=-1):
+        recipe = self[index]
+        self.delete(self.name_key(recipe.name))
+        return recipe
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+
+from benchmark import SEED_FILE, quiet
+from recipe_manager import Recipe, Recipe_Manager, name_key
+
+
+
+# several registers writing one recipes.csv at once: every writer process adds its own recipes and
+# deletes some of them again, then the final catalog is checked for every one of those changes
+
+
+def writer(args):
+    path, number, ops, journal, delete_every = args
+    added = []
+    deleted = []
+    with quiet():
+        manager = Recipe_Manager(path, journal=journal)
+        start = time.perf_counter()
+        for i in range(ops):
+            name = f"Register {number} Brew {i}"
+            manager.new_recipe(Recipe(name, "Mocha", 2, "Dark", 1, True, False, False))
+            added.append(name)
+            if delete_every and i % delete_every == delete_every - 1: # drop one of our older adds
+                doomed = added[len(deleted) * delete_every]
+                manager.delete_many([doomed])
+                deleted.append(doomed)
+        seconds = time.perf_counter() - start
+    return {"added": added, "deleted": deleted, "merges": manager.merge_count, "seconds": seconds}
+
+
+def run(writers=8, ops=100, journal=False, delete_every=5, seed_file=SEED_FILE):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "recipes.csv")
+        shutil.copy(seed_file, path)
+        with quiet():
+            expected = set(name_key(recipe.name) for recipe in Recipe_Manager(path).recipes)
+        start = time.perf_counter()
+        with Pool(writers) as pool:
+            results = pool.map(writer, [(path, number, ops, journal, delete_every) for number in range(writers)])
+        elapsed = time.perf_counter() - start
+        for result in results:
+            expected |= set(name_key(name) for name in result["added"])
+            expected -= set(name_key(name) for name in result["deleted"])
+        with quiet():
+            final = set(name_key(recipe.name) for recipe in Recipe_Manager(path).recipes)
+    commits = sum(len(result["added"]) + len(result["deleted"]) for result in results)
+    return {
+        "writers": writers,
+        "journal": journal,
+        "commits": commits,
+        "seconds": round(elapsed, 3),
+        "commits_per_sec": round(commits / elapsed, 1),
+        "merges": sum(result["merges"] for result in results),
+        "lost": len(expected - final), # changes some writer made that the catalog doesn't have
+        "unexpected": len(final - expected) # recipes that should have been deleted
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writers on one recipes.csv")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 8], help="writer process counts to run")
+    parser.add_argument("--ops", type=int, default=100, help="adds per writer")
+    parser.add_argument("--delete-every", type=int, default=5, help="each writer deletes one of its adds every N adds (0 = never)")
+    parser.add_argument("--journal", action="store_true", help="also run with journal=True")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    failed = False
+    for journal in ((False, True) if args.journal else (False,)):
+        for writers in args.writers:
+            result = run(writers, args.ops, journal, args.delete_every)
+            failed = failed or result["lost"] or result["unexpected"]
+            if args.json:
+                print(json.dumps(result))
+            else:
+                mode = "journal" if journal else "csv"
+                print(f"{mode:<8} {writers:>3} writers {result['commits']:>7} commits {result['commits_per_sec']:>10,.1f} commits/s "
+                      f"{result['merges']:>6} merges  lost {result['lost']}  unexpected {result['unexpected']}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # the modules live at the repo root
+
+from schema import FIELDNAMES
+
+
+
+def write_csv(path, rows, header=True): # rows of plain values, written the way save_recipe writes them
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        if header:
+            writer.writerow(FIELDNAMES)
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_csv(path):
+    with open(path, mode='r', newline='', encoding='utf-8') as file:
+        return list(csv.reader(file))
+
+
+@pytest.fixture
+def catalog(tmp_path): # a small recipes.csv in its own folder, so its .log / .lock / .snap files are too
+    return write_csv(tmp_path / "recipes.csv", [
+        ["Caramel Cloud Latte", "Caramel", 3, "Light", 1, True, True, False],
+        ["Midnight Macchiato", "Mocha", 2, "", 1, False, False, False],
+        ["Deez Nutz", "Hazelnut", 4, "", 3, False, False, False],
+        ["Iced Vanilla", "Vanilla", 2, "Medium", 2, True, False, True]
+    ])
@@ -0,0 +1,32 @@
+from analytics import SalesReport, parse_time
+
+
+
+ROWS = [ # (time, name, flavor, roast, size, pump, shot, creamer, sugar, cents)
+    (3600, "Deez Nutz", "Hazelnut", "", 3, 4, 3, 0, 0, 650),
+    (3700, "Iced Vanilla", "Vanilla", "Medium", 1, 2, 2, 1, 0, 425),
+    (90000, "Deez Nutz", "Hazelnut", "", 1, 4, 3, 0, 1, 500),
+    (90100, "Caramel Cloud Latte", "Caramel", "Light", 2, 3, 1, 1, 1, 550)
+]
+
+
+def test_report_sums_orders_by_key_and_window():
+    report = SalesReport().update(ROWS)
+    assert (report.orders, report.cents, report.first, report.last) == (4, 2125, 3600, 90100)
+    assert report.pumps_by_flavor == {"Hazelnut": 8, "Vanilla": 2, "Caramel": 3}
+    assert report.shots_by_roast == {"Medium": 2, "Light": 1} # no roast, no shots counted
+    assert (report.creamers, report.sugars) == (2, 2)
+    assert report.top(1) == [("Deez Nutz", 2)]
+    summary = report.to_dict()
+    assert summary["revenue_by_size"] == {"Sm": 9.25, "Med": 5.5, "Lg": 6.5}
+    assert summary["windows"] == [{"start": 0, "orders": 2, "revenue": 10.75}, {"start": 86400, "orders": 2, "revenue": 10.5}]
+
+
+def test_merged_reports_match_one_report_over_both_logs():
+    merged = SalesReport(window=3600).update(ROWS[:2]).merge(SalesReport(window=3600).update(ROWS[2:]))
+    assert merged.to_dict() == SalesReport(window=3600).update(ROWS).to_dict()
+
+
+def test_since_and_until_bound_the_report():
+    report = SalesReport(since=parse_time("1970-01-01T01:00"), until=parse_time("90000")).update(ROWS)
+    assert report.orders == 2 and report.popularity == {"Deez Nutz": 1, "Iced Vanilla": 1}
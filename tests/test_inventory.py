@@ -0,0 +1,44 @@
+import math
+
+from inventory import Inventory
+
+
+
+def row(when, flavor, pump, roast="", shot=0, creamer=0, sugar=0): # an order log row
+    return (when, "Drink", flavor, roast, 1, pump, shot, creamer, sugar, 100)
+
+
+def test_deplete_takes_each_ingredient_off_the_stock(tmp_path):
+    inventory = Inventory(str(tmp_path / "inventory.json"), save_every=0)
+    inventory.set_level("syrup:Mocha", 20)
+    inventory.restock("syrup:Mocha", 5)
+    assert inventory.deplete([row(100, "Mocha", 2, "Dark", 1, creamer=3), row(100, "Mocha", 4, sugar=1), row(100, "", 3)]) == 3
+    assert inventory.level("syrup:Mocha") == 19
+    assert inventory.level("roast:Dark") == -1 # used more than was stocked
+    assert (inventory.level("creamer"), inventory.level("sugar")) == (-3, -1)
+    assert inventory.level("syrup:") == 0 # no flavor, no syrup
+
+
+def test_forecast_follows_the_decayed_rate(tmp_path):
+    inventory = Inventory(str(tmp_path / "inventory.json"), save_every=0)
+    inventory.set_level("syrup:Mocha", 12)
+    inventory.set_level("syrup:Vanilla", 12)
+    inventory.set_level("sugar", 5)
+    inventory.deplete([row(0, "Mocha", 6), row(0, "Vanilla", 3)])
+    assert inventory.rate("syrup:Mocha", 0) == 6.0
+    assert math.isclose(inventory.rate("syrup:Mocha", 3600), 6 / math.e) # an hour later it counts 1/e as much
+    forecast = inventory.forecast(0)
+    assert [entry["ingredient"] for entry in forecast] == ["syrup:Mocha", "syrup:Vanilla", "sugar"]
+    assert [entry["hours_left"] for entry in forecast] == [1.0, 3.0, None]
+    inventory.deplete([row(-1800, "Vanilla", 3)]) # a late order decays to the newer time
+    assert math.isclose(inventory.rate("syrup:Vanilla", 0), 3 + 3 * math.exp(-0.5))
+
+
+def test_stock_is_saved_every_few_orders(tmp_path):
+    path = str(tmp_path / "inventory.json")
+    inventory = Inventory(path, save_every=2)
+    inventory.deplete([row(0, "Mocha", 1)])
+    assert Inventory(path).level("syrup:Mocha") == 0
+    inventory.deplete([row(1, "Mocha", 1)])
+    saved = Inventory(path)
+    assert saved.level("syrup:Mocha") == -2 and saved.usage == inventory.usage
@@ -0,0 +1,54 @@
+import io
+import json
+
+from inventory import Inventory
+from order_log import OrderLog
+from orders import OrderSession, parse_size, run_orders
+from recipe_manager import Recipe_Manager
+
+
+
+def test_malformed_orders_get_error_receipts(catalog):
+    lines = [
+        '{"recipe": "Deez Nutz", "size": "l"}',
+        'not json',
+        '[]',
+        '"latte"',
+        '{"recipe": 5}',
+        '{"custom": {"pumps": [1]}}',
+        '{"recipe": "Nope"}',
+        '{"custom": {"flavor": "Mocha", "pumps": 2}, "size": 2}'
+    ]
+    source = catalog + ".orders"
+    with open(source, mode='w', encoding='utf-8') as file:
+        file.write("\n".join(lines) + "\n")
+    out = io.StringIO()
+    run_orders(Recipe_Manager(catalog, lazy=True), source, out=out)
+    receipts = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [receipt["order"] for receipt in receipts[:-1]] == list(range(1, 9))
+    assert [("error" in receipt) for receipt in receipts[:-1]] == [False, True, True, True, True, True, True, False]
+    assert receipts[-1]["summary"]["orders"] == 8
+
+
+def test_orders_are_logged_and_taken_out_of_stock(catalog, tmp_path):
+    log = OrderLog(str(tmp_path / "orders.log"))
+    inventory = Inventory(str(tmp_path / "inventory.json"), save_every=0)
+    session = OrderSession(Recipe_Manager(catalog), order_log=log, inventory=inventory)
+    receipts = list(session.process([{"recipe": "Deez Nutz"}, [], {"recipe": "Midnight Macchiato", "size": "m"}]))
+    assert "error" in receipts[1]
+    assert session.close()["subtotal"] == round(receipts[0]["subtotal"] + receipts[2]["subtotal"], 2)
+    assert sum(1 for row in log) == 2
+
+
+def test_custom_drinks_are_checked_against_the_schema(catalog):
+    session = OrderSession(Recipe_Manager(catalog))
+    good, bad = session.process([
+        {"custom": {"flavor": "Mocha", "pumps": 2, "shots": "1", "creamer": True}, "size": "large"},
+        {"custom": {"pumps": "two"}}
+    ])
+    assert good["name"] == "Custom coffee" and good["size"] == "Lg" and good["pump"] == 2 and good["creamer"] == 3
+    assert bad["error"].startswith("custom drink: pumps")
+
+
+def test_sizes_read_like_the_size_menu():
+    assert [parse_size(size) for size in ("m", "Large", 3, "2", "huge", None)] == [2, 3, 3, 2, 1, 1]
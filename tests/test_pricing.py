@@ -0,0 +1,54 @@
+import pytest
+
+import pricing
+from pricing import PriceCache, PricingEngine
+
+
+
+DRINKS = [
+    (["Caramel Latte", "Caramel", 3, "Light", 1, True, True, False], 1),
+    (["Black", "", '', "Dark", 2, False, False, False], 3),
+    (["Mocha", "Mocha", 2, '', '', True, False, True], 2),
+    (["Canceled", '', 0, '', '', False, False, False], 0)
+]
+
+
+def test_one_drink_is_priced_per_size_step():
+    price = PricingEngine().price_one(["Caramel Latte", "Caramel", 3, "Light", 1, True, True, False], 2)
+    assert price["size_total"] == 2.0
+    assert price["pump_total"] == .75
+    assert price["shot_total"] == .5
+    assert price["creamer"] == 6 # lattes take three creamers per size step
+    assert round(price["subtotal"], 2) == round(2.0 + .75 + .5 + 6 * .1 + 2 * .05, 2)
+
+
+def test_batches_price_each_drink_like_price_one():
+    engine = PricingEngine()
+    batch = engine.price_batch(DRINKS)
+    for i, (drink, size) in enumerate(DRINKS):
+        assert float(batch["subtotal"][i]) == engine.price_one(drink, size)["subtotal"]
+    assert batch["batch_subtotal"] == sum(engine.price_one(drink, size)["subtotal"] for drink, size in DRINKS)
+    assert batch["total"] == batch["batch_subtotal"] + batch["tip"]
+
+
+def test_big_batches_price_the_same_as_small_ones():
+    engine = PricingEngine()
+    drinks = DRINKS * (pricing.NUMPY_MIN_BATCH // len(DRINKS) + 1) # big enough for numpy, when it is installed
+    big = engine.price_batch(drinks)["subtotal"]
+    assert [float(value) for value in big] == [engine.price_one(drink, size)["subtotal"] for drink, size in drinks]
+
+
+def test_price_cache_follows_set_prices():
+    engine = PricingEngine()
+    cache = PriceCache(engine)
+    drink = ["Espresso", '', '', '', 2, False, False, False]
+    before = cache.lookup(drink, 1)["subtotal"]
+    engine.set_prices({"shot": 2.0})
+    assert cache.lookup(drink, 1)["subtotal"] == engine.price_one(drink, 1)["subtotal"] == before + 3.0
+
+
+def test_prices_cannot_be_changed_in_place():
+    engine = PricingEngine()
+    with pytest.raises(TypeError):
+        engine.prices["shot"] = 2.0
+    assert engine.prices["shot"] == .5
@@ -0,0 +1,214 @@
+import os
+
+from conftest import read_csv, write_csv
+from recipe_manager import Recipe, Recipe_Manager, User_Interaction, run_cli
+
+
+
+def names(recipes):
+    return [recipe.name for recipe in recipes]
+
+
+def test_names_are_looked_up_without_case(catalog):
+    register = Recipe_Manager(catalog)
+    assert register.find_recipe("deez NUTZ").name == "Deez Nutz"
+    assert register.exact_match("midnight macchiato")[0] == "Midnight Macchiato"
+    assert register.has_name("Iced vanilla") and not register.has_name("Iced")
+
+
+def test_filters_follow_catalog_order(catalog):
+    register = Recipe_Manager(catalog)
+    assert names(register.filter_recipes(creamer=True)) == ["Caramel Cloud Latte", "Iced Vanilla"]
+    assert names(register.filter_recipes(creamer=True, iced=False)) == ["Caramel Cloud Latte"]
+    assert names(register.filter_recipes(flavor="Mocha", sugar=False)) == ["Midnight Macchiato"]
+    assert register.list_flavors() == ["Caramel", "Mocha", "Hazelnut", "Vanilla"]
+    register.del_recipe(register.index_of("Midnight Macchiato"))
+    register.new_recipe(Recipe("Mocha Two", "Mocha", 1, creamer=True))
+    assert register.list_flavors() == ["Caramel", "Hazelnut", "Vanilla", "Mocha"]
+    assert names(register.filter_recipes(creamer=True)) == ["Caramel Cloud Latte", "Iced Vanilla", "Mocha Two"]
+
+
+def test_bulk_load_indexes_like_single_adds(catalog):
+    loaded = Recipe_Manager(catalog)
+    added = Recipe_Manager(catalog, lazy=True)
+    added.loaded = True
+    for recipe in loaded.recipes:
+        added.store_recipe(recipe)
+    for index in ("name_index", "flavor_index", "roast_index", "flag_index"):
+        assert repr(getattr(loaded, index).keys()) == repr(getattr(added, index).keys())
+    assert {f: list(b) for f, b in loaded.flavor_index.items()} == {f: list(b) for f, b in added.flavor_index.items()}
+    assert {f: list(b) for f, b in loaded.flag_index.items()} == {f: list(b) for f, b in added.flag_index.items()}
+
+
+def test_rows_that_repeat_a_name_survive_a_save(tmp_path):
+    path = write_csv(tmp_path / "recipes.csv", [
+        ["Mocha", "Chocolate", 2, "", 1, False, False, False],
+        ["mocha", "Chocolate", 3, "", 1, True, False, False]
+    ])
+    register = Recipe_Manager(path)
+    assert names(register.recipes) == ["Mocha"]
+    register.new_recipe(Recipe("Latte", "Vanilla", 1))
+    assert [row[0] for row in read_csv(path)[1:]] == ["Mocha", "Latte", "mocha"]
+
+
+def test_refresh_reloads_only_after_an_outside_write(catalog):
+    register = Recipe_Manager(catalog)
+    register.refresh()
+    assert register.reload_count == 0 # nothing changed on disk
+    Recipe_Manager(catalog).new_recipe(Recipe("Added Elsewhere", "Vanilla", 1))
+    register.refresh()
+    assert register.reload_count == 1
+    assert register.has_name("added elsewhere")
+    register.refresh()
+    assert register.reload_count == 1
+
+
+def test_own_writes_do_not_count_as_reloads(catalog):
+    register = Recipe_Manager(catalog)
+    register.new_recipe(Recipe("Mine", "Mocha", 2))
+    register.refresh()
+    assert register.reload_count == 0
+
+
+def test_menus_share_one_manager(catalog):
+    register = Recipe_Manager(catalog)
+    ui = User_Interaction(register)
+    assert ui.load_manager() is register
+    assert ui.load_manager() is register
+    assert register.reload_count == 0
+
+
+def test_journal_replay_ignores_a_torn_last_line(catalog):
+    with open(catalog + ".log", mode='w', newline='', encoding='utf-8') as file:
+        file.write("add,Logged,Mocha,1,,1,False,False,False\r\n")
+        file.write("add,Torn,Moc") # a crash mid-append
+    register = Recipe_Manager(catalog, journal=True)
+    assert register.has_name("Logged")
+    assert not register.has_name("Torn")
+    assert register.journal_count == 1
+
+
+def test_append_cuts_a_torn_line_before_writing(catalog):
+    with open(catalog + ".log", mode='w', newline='', encoding='utf-8') as file:
+        file.write("add,Logged,Mocha,1,,1,False,False,False\r\n")
+        file.write("del,Deez")
+    register = Recipe_Manager(catalog, journal=True)
+    register.new_recipe(Recipe("After", "Vanilla", 2))
+    rows = read_csv(catalog + ".log")
+    assert [row[:2] for row in rows] == [["add", "Logged"], ["add", "After"]]
+    reloaded = Recipe_Manager(catalog, journal=True)
+    assert reloaded.has_name("After") and reloaded.has_name("Deez Nutz")
+
+
+def test_torn_journal_end(catalog):
+    register = Recipe_Manager(catalog, journal=True)
+    for data, end in [(b"", None), (b"add,a\n", None), (b"add,a\r\nadd,b", 7), (b"add,b", 0), (b"del,a\n" + b"x" * 10000, 6)]:
+        with open(register.journal_name, 'wb') as file:
+            file.write(data)
+        assert register.torn_journal_end() == end
+
+
+def test_journal_compacts_into_the_csv(catalog):
+    register = Recipe_Manager(catalog, journal=True, journal_limit=3)
+    register.new_recipe(Recipe("One", "Mocha", 1))
+    register.del_recipe(register.index_of("Deez Nutz"))
+    assert len(read_csv(catalog + ".log")) == 2
+    assert "One" not in [row[0] for row in read_csv(catalog)] # only logged so far
+    register.new_recipe(Recipe("Two", "Mocha", 1)) # third entry: folded into the csv
+    assert not os.path.exists(catalog + ".log")
+    assert [row[0] for row in read_csv(catalog)[1:]] == ["Caramel Cloud Latte", "Midnight Macchiato", "Iced Vanilla", "One", "Two"]
+
+
+def test_lazy_pages_match_a_full_load(tmp_path):
+    rows = []
+    for i in range(40):
+        rows.append([f"Drink {i}", "Mocha", i % 5, "", 1, False, False, False])
+        if i % 7 == 0:
+            rows.append([f"drink {i}", "Vanilla", 1, "", 1, False, False, False]) # repeats a name
+        if i % 9 == 0:
+            rows.append([f"Bad {i}", "Mocha", "lots", "", 1, False, False, False]) # fails the schema
+        if i % 11 == 0:
+            rows.append([]) # blank line
+    path = write_csv(tmp_path / "recipes.csv", rows)
+    expected = names(Recipe_Manager(path).recipes)
+    assert len(expected) == 40
+    for page_size in (1, 3, 7, 40, 100):
+        lazy = Recipe_Manager(path, lazy=True)
+        lazy.OFFSET_STEP = 4 # small, so the pages start from checkpoints other than the first
+        paged = []
+        cursor = 0
+        while cursor is not None:
+            page, cursor = lazy.page_recipes("catalog", cursor, page_size)
+            paged += names(page)
+        assert paged == expected
+        assert not lazy.loaded
+        assert names(lazy.page_recipes("catalog", 13, 5)[0]) == expected[13:18] # from any cursor, not just page starts
+
+
+def test_lazy_catalog_streams_without_loading(catalog, capsys):
+    register = Recipe_Manager(catalog, lazy=True)
+    assert names(register.iter_recipes()) == names(Recipe_Manager(catalog).recipes)
+    register.view_recipes(limit=2, style="plain")
+    assert capsys.readouterr().out.count("\n") == 2
+    register.view_recipes(limit=0, style="plain")
+    assert capsys.readouterr().out == ""
+    assert not register.loaded
+
+
+def test_add_many_saves_once_and_reports_duplicates(catalog):
+    register = Recipe_Manager(catalog)
+    result = register.add_many([Recipe("One", "Mocha", 1), Recipe("deez nutz", "Mocha", 1), Recipe("one", "Vanilla", 2), Recipe("Two")])
+    assert result == {"added": ["One", "Two"], "skipped": ["deez nutz", "one"]}
+    assert [row[0] for row in read_csv(catalog)[-2:]] == ["One", "Two"]
+    assert register.lock.version() == 1 # one write for the whole batch
+
+
+def test_delete_many_takes_names_and_positions(catalog):
+    register = Recipe_Manager(catalog)
+    result = register.delete_many([0, "deez nutz", "Nope", 99])
+    assert result == {"deleted": ["Caramel Cloud Latte", "Deez Nutz"], "missing": ["Nope", 99]}
+    assert names(register.recipes) == ["Midnight Macchiato", "Iced Vanilla"]
+    assert names(Recipe_Manager(catalog).recipes) == ["Midnight Macchiato", "Iced Vanilla"]
+    assert register.delete_many(["Nope"]) == {"deleted": [], "missing": ["Nope"]}
+
+
+def test_import_csv_command(catalog, tmp_path, capsys):
+    source = write_csv(tmp_path / "more.csv", [
+        ["Imported", "Mocha", 1, "", 1, False, False, False],
+        ["Deez Nutz", "Mocha", 1, "", 1, False, False, False],
+        ["Broken", "Mocha", "x", "", 1, False, False, False]
+    ])
+    run_cli(["--file", catalog, "import-csv", source])
+    assert "Imported 1 recipes" in capsys.readouterr().out.splitlines()[-1]
+    assert Recipe_Manager(catalog).has_name("Imported")
+
+
+def test_commit_merges_another_registers_changes(catalog):
+    first = Recipe_Manager(catalog)
+    second = Recipe_Manager(catalog)
+    first.new_recipe(Recipe("From First", "Mocha", 1))
+    second.new_recipe(Recipe("From Second", "Vanilla", 2)) # read before first committed
+    second.del_recipe(second.index_of("Deez Nutz"))
+    assert second.merge_count == 1
+    on_disk = names(Recipe_Manager(catalog).recipes)
+    assert "From First" in on_disk and "From Second" in on_disk
+    assert "Deez Nutz" not in on_disk
+
+
+def test_commit_merge_in_journal_mode(catalog):
+    first = Recipe_Manager(catalog, journal=True)
+    second = Recipe_Manager(catalog, journal=True)
+    first.new_recipe(Recipe("From First", "Mocha", 1))
+    second.new_recipe(Recipe("From Second", "Vanilla", 2))
+    assert second.merge_count == 1
+    on_disk = names(Recipe_Manager(catalog, journal=True).recipes)
+    assert "From First" in on_disk and "From Second" in on_disk
+
+
+def test_a_name_added_by_another_register_first_is_lost(catalog):
+    first = Recipe_Manager(catalog)
+    second = Recipe_Manager(catalog)
+    first.new_recipe(Recipe("Same", "Mocha", 1))
+    result = second.add_many([Recipe("same", "Vanilla", 2), Recipe("Other", "Vanilla", 2)])
+    assert result == {"added": ["Other"], "skipped": ["same"]}
+    assert Recipe_Manager(catalog).find_recipe("Same").flavor == "Mocha"
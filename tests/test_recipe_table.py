@@ -0,0 +1,51 @@
+import pytest
+
+from recipe_manager import Recipe, Recipe_Manager
+from recipe_table import RecipeTable
+
+
+
+def fields(recipe):
+    return recipe.list_recipe()
+
+
+def test_rows_come_back_as_they_went_in():
+    table = RecipeTable(Recipe)
+    recipes = [
+        Recipe("Latte", "Vanilla", 2, "Dark", 1, True, False, True),
+        Recipe("Plain"),
+        Recipe("Zero", "Mocha", 0, None, 0, False, True, False)
+    ]
+    rows = [table.append(recipe) for recipe in recipes]
+    assert [fields(table.row(row)) for row in rows] == [fields(recipe) for recipe in recipes]
+    assert [fields(recipe) for recipe in table] == [fields(recipe) for recipe in recipes]
+    assert table.strings.count("Vanilla") == 1 # interned once
+
+
+def test_positions_shift_but_row_ids_stay():
+    table = RecipeTable(Recipe)
+    rows = [table.append(Recipe(name)) for name in "abcde"]
+    assert table.pop(1).name == "b"
+    assert [recipe.name for recipe in table] == ["a", "c", "d", "e"]
+    assert table.row(rows[3]).name == "d"
+    table.retain({rows[0], rows[4]})
+    assert [recipe.name for recipe in table[0:5]] == ["a", "e"]
+    assert len(table) == 2
+
+
+def test_counts_that_do_not_fit_change_nothing():
+    table = RecipeTable(Recipe)
+    with pytest.raises(ValueError):
+        table.append(Recipe("Huge", "Mocha", 2**40))
+    assert len(table) == 0 and table.names == [] and len(table.flavors) == 0
+
+
+def test_columnar_manager_matches_the_list_store(catalog):
+    assert [fields(r) for r in Recipe_Manager(catalog, columnar=True).recipes] == [fields(r) for r in Recipe_Manager(catalog).recipes]
+
+
+def test_counts_the_stores_cannot_hold_are_refused(catalog):
+    register = Recipe_Manager(catalog, columnar=True)
+    result = register.add_many([Recipe("Huge", "Mocha", 2**40), Recipe("Fine", "Mocha", 2)])
+    assert result == {"added": ["Fine"], "skipped": ["Huge"]}
+    assert len(register.recipes) == 5
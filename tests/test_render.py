@@ -0,0 +1,77 @@
+import io
+import json
+
+from colors import bold, borange, default, green, orange, red
+from pricing import PricingEngine
+from recipe_manager import run_cli
+from render import Receipt
+
+
+
+ORDERS = [
+    (["Caramel Cloud Latte", "Caramel", 3, "Light", 1, True, True, False], 2),
+    (["Canceled", "", 0, "", "", False, False, False], 0),
+    (["Deez Nutz", "Hazelnut", 4, "", 3, False, False, False], 3)
+]
+
+
+def old_receipt(orders): # what prepare_receipt and print_receipt used to print
+    txt = ""
+    grand_total = 0
+    for x, (chosen_recipe, size) in enumerate(orders, 1):
+        pump = 0.0 if chosen_recipe[2] == '' else float(chosen_recipe[2])
+        shot = 0.0 if chosen_recipe[4] == '' else float(chosen_recipe[4])
+        creamer = (3.0 if "latte" in chosen_recipe[0].lower() else 1.0) * size if chosen_recipe[5] == True else 0.0
+        sugar = 1.0 * size if chosen_recipe[6] == True else 0.0
+        size_total, pump_total, shot_total, creamer_total, sugar_total = size * 1.0, pump * .25, shot * .5, creamer * .1, sugar * .05
+        subtotal = size_total + pump_total + shot_total + creamer_total + sugar_total
+        size_str = {0: "", 1: "Sm", 2: "Med", 3: "Lg"}[size]
+        if chosen_recipe[0] == "Canceled":
+            receipt_item = f"{red} {x}. {'-' * 34} {chosen_recipe[0]}{default}"
+            txt += f"{receipt_item:<58}\n"
+        else:
+            receipt_item = f" {x}. {green}{chosen_recipe[0]}{default} ({size_str})"
+            txt += (
+                f"{receipt_item:<58}{size_total:.2f}\n      {chosen_recipe[1]:<10}\t  Qty: {pump:.0f}    {pump_total:.2f}\n"
+                f"      {'espresso shots':<10}\t  Qty: {shot:.0f}    {shot_total:.2f}\n      {'cream':<10}\t  Qty: {creamer:.0f}    {creamer_total:.2f}\n"
+                f"      {'sugar':<10}\t  Qty: {sugar:.0f}    {sugar_total:.2f}\n\t\t\t\t\t  {orange}{subtotal:>5.2f}{default}\n"
+            )
+        grand_total += subtotal
+    tip = grand_total * .2
+    return "".join([
+        f"{borange}{'Receipt':^49}{default}\n", "-" * 49 + "\n", txt + "\n",
+        f"{orange}{'Subtotal:':>33}{default}   {grand_total:.2f}\n",
+        f"{orange}{'20% Gratuity:':>33}{default}   {tip:.2f}\n",
+        f"{orange}{'Total:':>33}{default}{bold}{grand_total + tip:>14.2f}{default}\n"
+    ])
+
+
+def receipt(style):
+    receipt = Receipt(PricingEngine(), style)
+    for x, (chosen_recipe, size) in enumerate(ORDERS, 1):
+        receipt.add(x, chosen_recipe, size)
+    return receipt
+
+
+def test_ansi_receipt_matches_the_old_text():
+    out = io.StringIO()
+    receipt("ansi").write(out)
+    assert out.getvalue() == old_receipt(ORDERS)
+
+
+def test_plain_receipt_is_the_old_text_without_escapes():
+    expected = old_receipt(ORDERS)
+    for code in (bold, borange, default, green, orange, red):
+        expected = expected.replace(code, "")
+    assert receipt("plain").render() == expected
+
+
+def test_json_receipt_and_records(catalog, capsys):
+    data = json.loads(receipt("json").render())
+    assert [item.get("name") for item in data["items"]] == ["Caramel Cloud Latte", None, "Deez Nutz"]
+    assert data["items"][1] == {"order": 2, "canceled": True}
+    assert data["total"] == round(data["subtotal"] * 1.2, 2)
+    run_cli(["--file", catalog, "--format", "json", "lookup", "Deez Nutz"])
+    assert json.loads(capsys.readouterr().out) == {
+        "name": "Deez Nutz", "flavor": "Hazelnut", "pumps": 4, "roast": None, "shots": 3, "creamer": False, "sugar": False, "iced": False
+    } # an unset roast is null, not ""
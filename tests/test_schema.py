@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import read_csv, write_csv
+from recipe_manager import Recipe, Recipe_Manager
+from schema import MAX_COUNT, IngestReport, RowError, ingest, read_recipes
+
+
+
+def test_valid_rows_are_typed():
+    assert ingest.convert_row(["Latte", "", "2", "Dark", "", "True", "0", "false"]) == [
+        "Latte", None, 2, "Dark", None, True, False, False
+    ]
+
+
+@pytest.mark.parametrize("row, field", [
+    (["Latte", "", "two", "", "", "", "", ""], "pumps"),
+    (["Latte", "", "-1", "", "", "", "", ""], "pumps"),
+    (["Latte", "", "", "", str(MAX_COUNT + 1), "", "", ""], "shots"),
+    (["Latte", "", "", "", "", "yes", "", ""], "creamer"),
+    (["", "Mocha", "", "", "", "", "", ""], "name"),
+    (["Latte", "Mocha"], None)
+])
+def test_rows_that_do_not_fit_are_rejected(row, field):
+    with pytest.raises(RowError) as error:
+        ingest.convert_row(row)
+    assert error.value.field == field
+
+
+def test_largest_count_is_accepted():
+    assert ingest.convert_row(["Latte", "", str(MAX_COUNT), "", "", "", "", ""])[2] == MAX_COUNT
+
+
+def test_report_counts_and_lines(tmp_path):
+    path = write_csv(tmp_path / "recipes.csv", [
+        ["Good", "Mocha", 1, "", 1, False, False, False],
+        ["Bad Pumps", "Mocha", "x", "", 1, False, False, False],
+        ["Short", "Mocha"],
+        ["Huge", "Mocha", 99999999999, "", 1, False, False, False]
+    ])
+    report = IngestReport(path)
+    assert [recipe.name for recipe in read_recipes(path, Recipe, report)] == ["Good"]
+    assert (report.rows, report.loaded, report.rejected) == (4, 1, 3)
+    assert [(line, field) for line, field, value, message in report.errors] == [(3, "pumps"), (4, None), (5, "pumps")]
+
+
+def test_header_is_checked(tmp_path):
+    path = write_csv(tmp_path / "recipes.csv", [["name", "flavour"], ["Good", "Mocha", 1, "", 1, False, False, False]], header=False)
+    report = IngestReport(path)
+    assert len(list(read_recipes(path, Recipe, report))) == 1
+    assert report.errors[0][0] == 1 and not report.ok
+
+
+def test_rejected_rows_are_written_back_on_save(tmp_path):
+    path = write_csv(tmp_path / "recipes.csv", [
+        ["Good", "Mocha", 1, "", 1, False, False, False],
+        ["Huge", "Mocha", 99999999999, "", 1, False, False, False]
+    ])
+    register = Recipe_Manager(path, columnar=True, snapshot=True) # the row would overflow both stores
+    assert not register.has_name("Huge")
+    register.new_recipe(Recipe("New", "Vanilla", 2))
+    assert [row[0] for row in read_csv(path)[1:]] == ["Good", "New", "Huge"]
+    assert Recipe_Manager(path, lazy=True, snapshot=True).find_recipe("New").pumps == 2
+
+
+def test_convert_value_checks_json_values():
+    assert ingest.convert_value("pumps", 3) == 3
+    assert ingest.convert_value("iced", True) is True
+    assert ingest.convert_value("flavor", None) is None
+    with pytest.raises(RowError):
+        ingest.convert_value("shots", [1])
@@ -0,0 +1,42 @@
+from recipe_manager import Recipe, Recipe_Manager
+from search_index import SearchIndex
+
+
+
+def index_of(*docs):
+    index = SearchIndex()
+    for key, flavor in docs:
+        index.add(key, flavor)
+    return index
+
+
+def test_substring_keeps_catalog_order():
+    index = index_of(("deez nutz", "hazelnut"), ("nutter butter", "hazelnut"), ("mocha", "chocolate"), ("the nutcracker", None))
+    assert index.substring("nut") == ["deez nutz", "nutter butter", "the nutcracker"]
+    assert index.substring("NUTZ") == ["deez nutz"]
+    assert index.substring("ch") == ["mocha"] # too short for a trigram, checked name by name
+    assert index.substring("zzz") == []
+
+
+def test_search_tolerates_typos_and_ranks_names_first():
+    index = index_of(("caramel cloud latte", "caramel"), ("midnight macchiato", "mocha"), ("salted caramel", "caramel"))
+    assert [key for score, key in index.search("caramel", 3)] == ["salted caramel", "caramel cloud latte"] # shortest first
+    assert [key for score, key in index.search("carmel", 2)] == ["caramel cloud latte", "salted caramel"] # the flavor matches too
+    assert index.search("macchiatto", 1)[0][1] == "midnight macchiato"
+    assert index.search("   ") == []
+
+
+def test_removed_names_stop_matching():
+    index = index_of(*((f"latte {i}", "vanilla") for i in range(1200)))
+    for i in range(1100):
+        index.remove(f"latte {i}")
+    assert index.dead < 1100 # enough tombstones piled up to rebuild the postings
+    assert index.substring("latte 11") == [f"latte {i}" for i in range(1100, 1200) if "latte 11" in f"latte {i}"]
+
+
+def test_search_index_is_built_on_first_search(catalog):
+    register = Recipe_Manager(catalog)
+    assert register.search_index is None
+    assert [r.name for r in register.search_recipes("macchiatto", 1)] == ["Midnight Macchiato"]
+    register.new_recipe(Recipe("Macchiato Two", "Mocha", 1)) # kept current once built
+    assert "Macchiato Two" in [r.name for r in register.search_recipes("macchiato")]
@@ -0,0 +1,59 @@
+import asyncio
+
+from recipe_manager import Recipe_Manager
+from server import RecipeServer, request
+
+
+
+def call(catalog, *requests): # start a server on the catalog, send the requests in order, return [(status, body)]
+    async def run():
+        server = await RecipeServer(Recipe_Manager(catalog, journal=True), port=0).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            return [await request(reader, writer, *args) for args in requests]
+        finally:
+            writer.close()
+            await server.stop()
+    return asyncio.run(run())
+
+
+def test_lookup_search_and_flavors(catalog):
+    found, missing, empty, search, flavors = call(catalog,
+        ("GET", "/recipes/deez%20nutz"),
+        ("GET", "/recipes/Nope"),
+        ("GET", "/recipes/"),
+        ("GET", "/search?q=macchiatto&k=1"),
+        ("GET", "/flavors")
+    )
+    assert found == (200, {"recipe": ["Deez Nutz", "Hazelnut", 4, "", 3, False, False, False]})
+    assert missing[0] == 404 and empty[0] == 404
+    assert search[1]["results"][0][0] == "Midnight Macchiato"
+    assert flavors[1]["flavors"] == ["Caramel", "Mocha", "Hazelnut", "Vanilla"]
+
+
+def test_orders(catalog):
+    (status, body), (bad_status, bad) = call(catalog,
+        ("POST", "/orders", [{"recipe": "Deez Nutz", "size": "m"}, {"recipe": "Nope"}]),
+        ("POST", "/orders", {"recipe": 5})
+    )
+    assert status == 200
+    assert body["receipts"][0]["size"] == "Med" and "error" in body["receipts"][1]
+    assert body["summary"]["orders"] == 2
+    assert bad_status == 400
+
+
+def test_add_and_delete_are_saved(catalog, capsys):
+    added, duplicate, malformed, deleted, gone = call(catalog,
+        ("POST", "/recipes", {"name": "New Drink", "flavor": "Mocha", "pumps": 2, "iced": True}),
+        ("POST", "/recipes", {"name": "new drink"}),
+        ("POST", "/recipes", ["not", "an", "object"]),
+        ("DELETE", "/recipes/deez%20nutz"),
+        ("DELETE", "/recipes/Deez%20Nutz")
+    )
+    assert added == (201, {"recipe": ["New Drink", "Mocha", 2, "", "", False, False, True]})
+    assert duplicate[0] == 409 and malformed[0] == 400
+    assert deleted == (200, {"deleted": "Deez Nutz"})
+    assert gone[0] == 404
+    assert "Removed" not in capsys.readouterr().out
+    on_disk = Recipe_Manager(catalog, journal=True)
+    assert on_disk.has_name("New Drink") and not on_disk.has_name("Deez Nutz")
@@ -0,0 +1,54 @@
+import os
+
+from conftest import read_csv, write_csv
+from recipe_manager import Recipe, Recipe_Manager, run_cli
+
+
+
+def stores(tmp_path): # two shards that both have a Mocha, plus a file that isn't a csv
+    folder = tmp_path / "stores"
+    folder.mkdir()
+    write_csv(folder / "a.csv", [["Latte", "Vanilla", 1, "", 1, False, False, False], ["Mocha", "Chocolate", 2, "", 1, False, False, False]])
+    write_csv(folder / "b.csv", [["mocha", "Chocolate", 5, "", 2, True, False, False], ["Cold Brew", "", "", "Dark", 2, False, False, True]])
+    (folder / "notes.txt").write_text("not a catalog")
+    return str(folder)
+
+
+def test_shards_merge_in_path_order_with_conflicts_reported(tmp_path):
+    folder = stores(tmp_path)
+    for workers in (1, 2): # in this process, and in worker processes
+        register = Recipe_Manager(folder, workers=workers)
+        assert [r.name for r in register.recipes] == ["Latte", "Mocha", "Cold Brew"]
+        assert register.find_recipe("MOCHA").pumps == 2 # the first shard to use a name keeps it
+        assert register.conflicts == [{"name": "mocha", "kept": os.path.join(folder, "a.csv"), "skipped": os.path.join(folder, "b.csv")}]
+
+
+def test_a_glob_picks_the_same_shards(tmp_path):
+    folder = stores(tmp_path)
+    assert [r.name for r in Recipe_Manager(os.path.join(folder, "*.csv")).recipes] == ["Latte", "Mocha", "Cold Brew"]
+
+
+def test_sharded_catalogs_are_read_only(tmp_path, capsys):
+    folder = stores(tmp_path)
+    register = Recipe_Manager(folder)
+    register.new_recipe(Recipe("New", "Mocha", 1))
+    assert "changes are not saved" in capsys.readouterr().out
+    assert [row[0] for row in read_csv(os.path.join(folder, "a.csv"))[1:]] == ["Latte", "Mocha"]
+
+
+def test_lazy_reads_of_a_shard_folder_load_it(tmp_path, capsys):
+    folder = stores(tmp_path)
+    lazy = Recipe_Manager(folder, lazy=True)
+    assert [r.name for r in lazy.iter_recipes()] == ["Latte", "Mocha", "Cold Brew"]
+    assert [r.name for r in Recipe_Manager(folder, lazy=True).read_rows(1, 5)] == ["Mocha", "Cold Brew"]
+    capsys.readouterr()
+    run_cli(["--file", folder, "--format", "plain", "view", "--page", "2", "--page-size", "2"])
+    assert capsys.readouterr().out.strip().endswith("Iced: yes")
+
+
+def test_merge_command_writes_one_csv(tmp_path, capsys):
+    folder = stores(tmp_path)
+    target = str(tmp_path / "merged.csv")
+    run_cli(["merge", folder, "--into", target, "--workers", "1"])
+    assert "Duplicate 'mocha'" in capsys.readouterr().out
+    assert [row[0] for row in read_csv(target)] == ["name", "Latte", "Mocha", "Cold Brew"]
@@ -0,0 +1,47 @@
+from recipe_manager import Recipe, Recipe_Manager
+from similar import SimilarIndex
+
+
+
+QUERY = Recipe("Query", "Mocha", 2, "Dark", 1)
+
+
+def index_of(recipes):
+    index = SimilarIndex()
+    for key, recipe in recipes:
+        index.add(key, recipe)
+    return index
+
+
+def test_nearest_ranks_by_weighted_distance_and_breaks_ties_by_age():
+    index = index_of([
+        ("a", Recipe("A", "mocha", 2, "Dark", 1)),
+        ("b", Recipe("B", "Mocha", 3, "Dark", 1)),
+        ("c", Recipe("C", "Mocha", 2, "Dark", 1, creamer=True)),
+        ("d", Recipe("D", "Vanilla", 2, "Dark", 1)),
+        ("e", Recipe("E", "Mocha", 1, "Dark", 1)),
+        ("f", Recipe("F", "Mocha", 1, "Dark", 1)) # same profile as e
+    ])
+    assert index.nearest(QUERY, 4) == [(0.0, "a"), (0.5, "b"), (0.5, "e"), (0.5, "f")]
+    assert index.nearest(QUERY, 2, exclude="a") == [(0.5, "b"), (0.5, "e")]
+    assert index.nearest(QUERY, 10)[-1] == (3.0, "d")
+    assert index.nearest(QUERY, 0) == [] and SimilarIndex().nearest(QUERY) == []
+
+
+def test_removed_recipes_leave_their_profile_for_the_next_like_them():
+    index = index_of([("b", Recipe("B", "Mocha", 3, "Dark", 1)), ("e", Recipe("E", "Mocha", 1, "Dark", 1))])
+    index.remove("b")
+    index.remove("missing")
+    assert index.nearest(QUERY, 2) == [(0.5, "e")] and len(index) == 1
+    index.add("g", Recipe("G", "Mocha", 3, "Dark", 1)) # b's old profile, so it ranks ahead of e
+    assert index.nearest(QUERY, 2) == [(0.5, "g"), (0.5, "e")]
+
+
+def test_similar_recipes_follow_the_catalog(catalog):
+    register = Recipe_Manager(catalog)
+    assert [r.name for r in register.similar_recipes("iced vanilla", 2)] == ["Caramel Cloud Latte", "Midnight Macchiato"]
+    assert register.similar_recipes("Nope") is None
+    register.new_recipe(Recipe("Iced Vanilla Two", "Vanilla", 2, "Medium", 2, True, False, True))
+    register.del_recipe(register.index_of("Caramel Cloud Latte"))
+    assert [r.name for r in register.similar_recipes("Iced Vanilla", 2)] == ["Iced Vanilla Two", "Midnight Macchiato"]
+    assert [r.name for r in register.similar_recipes(Recipe("Custom", "Hazelnut", 4, None, 3), 1)] == ["Deez Nutz"]
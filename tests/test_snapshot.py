@@ -0,0 +1,53 @@
+import os
+
+from recipe_manager import Recipe, Recipe_Manager, name_key
+from snapshot import Snapshot, read_source_stamp, write_snapshot
+
+
+
+def test_snapshot_is_built_from_the_csv_and_used_next_start(catalog):
+    first = Recipe_Manager(catalog, snapshot=True) # no snapshot yet: parses the csv and compiles one
+    assert first.loaded and os.path.exists(catalog + ".snap")
+    second = Recipe_Manager(catalog, snapshot=True)
+    assert second.on_snapshot()
+    assert second.find_recipe("deez nutz").list_recipe() == first.find_recipe("Deez Nutz").list_recipe()
+    assert second.index_of("Iced Vanilla") == 3
+    assert second.list_flavors() == first.list_flavors()
+    assert [r.name for r in second.recipes[1:3]] == ["Midnight Macchiato", "Deez Nutz"]
+    assert not second.has_name("Nope")
+
+
+def test_a_changed_csv_makes_the_snapshot_stale(catalog):
+    Recipe_Manager(catalog, snapshot=True)
+    stamp = read_source_stamp(catalog + ".snap")
+    Recipe_Manager(catalog).new_recipe(Recipe("Added Later", "Mocha", 1))
+    stale = Recipe_Manager(catalog, snapshot=True) # csv moved on: loaded from it and recompiled
+    assert stale.loaded and stale.has_name("Added Later")
+    assert read_source_stamp(catalog + ".snap") != stamp
+    fresh = Recipe_Manager(catalog, snapshot=True)
+    assert fresh.on_snapshot() and fresh.has_name("Added Later")
+
+
+def test_a_pending_journal_skips_the_snapshot(catalog):
+    Recipe_Manager(catalog, snapshot=True)
+    Recipe_Manager(catalog, journal=True).new_recipe(Recipe("Logged", "Mocha", 1))
+    register = Recipe_Manager(catalog, snapshot=True, journal=True)
+    assert not register.on_snapshot() and register.has_name("Logged")
+
+
+def test_search_off_a_snapshot_uses_the_index(catalog, capsys):
+    Recipe_Manager(catalog, snapshot=True)
+    register = Recipe_Manager(catalog, snapshot=True)
+    capsys.readouterr()
+    register.view_recipes("nutts", style="plain")
+    assert "Did you mean: Deez Nutz?" in capsys.readouterr().out
+
+
+def test_recipes_that_do_not_fit_are_not_written(tmp_path):
+    path = str(tmp_path / "big.snap")
+    assert not write_snapshot(path, [Recipe("Huge", "Mocha", 2**40)], (1, 1), name_key)
+    assert not os.path.exists(path)
+    assert write_snapshot(path, [Recipe("Fine", "Mocha", 2)], (1, 1), name_key)
+    snapshot = Snapshot(path, Recipe, name_key)
+    assert snapshot.get("fine").pumps == 2 and snapshot.source_stamp == (1, 1)
+    snapshot.close()
@@ -0,0 +1,43 @@
+from recipe_manager import Recipe, Recipe_Manager, name_key
+from sorted_view import SortedView
+
+
+
+RECIPES = [
+    Recipe("b Latte", "Mocha", 1, "Dark", 2),
+    Recipe("A Latte", "", 1, "", ""),
+    Recipe("c Latte", "mocha", 1, "light", 1),
+    Recipe("D Latte", "Caramel", 1, None, 2)
+]
+
+
+def test_each_order_puts_missing_values_last_and_ties_by_name():
+    orders = {sort: SortedView(sort, RECIPES, name_key).keys(0, None) for sort in ("name", "flavor", "roast", "shots")}
+    assert orders["name"] == ["a latte", "b latte", "c latte", "d latte"]
+    assert orders["flavor"] == ["d latte", "b latte", "c latte", "a latte"] # mocha and Mocha tie
+    assert orders["roast"] == ["b latte", "c latte", "a latte", "d latte"]
+    assert orders["shots"] == ["c latte", "b latte", "d latte", "a latte"]
+
+
+def test_adds_and_removes_keep_the_order():
+    view = SortedView("flavor", RECIPES, name_key)
+    view.add(Recipe("Another", "Caramel", 1), "another")
+    view.remove(RECIPES[0], "b latte")
+    view.remove(Recipe("Never Added", "Mocha"), "never added")
+    assert view.keys(0, None) == ["another", "d latte", "c latte", "a latte"]
+    assert view.keys(1, 3) == ["d latte", "c latte"] and len(view) == 4
+
+
+def test_pages_follow_the_catalog_as_it_changes(catalog):
+    register = Recipe_Manager(catalog)
+    assert [r.name for r in register.page_recipes("roast", 0, 2)[0]] == ["Caramel Cloud Latte", "Iced Vanilla"]
+    register.new_recipe(Recipe("Americano", "", 0, "Dark", 2))
+    register.del_recipe(register.index_of("Caramel Cloud Latte"))
+    page, cursor = register.page_recipes("roast", 0, 2)
+    assert [r.name for r in page] == ["Americano", "Iced Vanilla"] and cursor == 2
+    assert register.page_recipes("shots", 3, 2) == ([register.find_recipe("Deez Nutz")], None)
+
+
+def test_view_page_past_the_end(catalog, capsys):
+    Recipe_Manager(catalog).view_recipes(page=5, page_size=2, style="plain")
+    assert "Page 6 is past the end" in capsys.readouterr().out
@@ -0,0 +1,42 @@
+from recipe_manager import Recipe, Recipe_Manager
+
+
+
+def names(recipes):
+    return [recipe.name for recipe in recipes]
+
+
+def sqlite_catalog(tmp_path, catalog): # the csv fixture imported into a .db
+    register = Recipe_Manager(str(tmp_path / "catalog.db"))
+    register.add_many(register.csv_recipes(catalog))
+    return register
+
+
+def test_sqlite_answers_like_the_csv(tmp_path, catalog):
+    db = sqlite_catalog(tmp_path, catalog)
+    csv = Recipe_Manager(catalog)
+    assert names(db.recipes) == names(csv.recipes)
+    assert db.find_recipe("deez nutz").list_recipe() == csv.find_recipe("Deez Nutz").list_recipe()
+    assert db.list_flavors() == csv.list_flavors()
+    assert names(db.filter_recipes(creamer=True, iced=False)) == names(csv.filter_recipes(creamer=True, iced=False))
+    assert names(db.page_recipes("name", 1, 2)[0]) == names(csv.page_recipes("name", 1, 2)[0])
+    assert db.index_of("Iced Vanilla") == 3
+
+
+def test_sqlite_changes_are_committed_as_they_happen(tmp_path, catalog):
+    db = sqlite_catalog(tmp_path, catalog)
+    db.new_recipe(Recipe("New", "Mocha", 1))
+    assert db.add_many([Recipe("new", "Mocha", 1), Recipe("Other", "Mocha", 1)]) == {"added": ["Other"], "skipped": ["new"]}
+    assert db.delete_many(["Deez Nutz", "Nope"]) == {"deleted": ["Deez Nutz"], "missing": ["Nope"]}
+    reopened = Recipe_Manager(db.filename)
+    assert names(reopened.recipes) == ["Caramel Cloud Latte", "Midnight Macchiato", "Iced Vanilla", "New", "Other"]
+
+
+def test_lazy_sqlite_catalog_reads_through_the_backend(tmp_path, catalog, capsys):
+    path = sqlite_catalog(tmp_path, catalog).filename
+    lazy = Recipe_Manager(path, lazy=True)
+    assert names(lazy.iter_recipes()) == names(Recipe_Manager(catalog).recipes)
+    assert names(lazy.read_rows(1, 2)) == ["Midnight Macchiato", "Deez Nutz"]
+    capsys.readouterr()
+    Recipe_Manager(path, lazy=True).view_recipes(limit=2, style="plain")
+    assert capsys.readouterr().out.splitlines()[1].startswith("2. Midnight Macchiato")